@@ -1,39 +1,33 @@
 import streamlit as st
 import pandas as pd
 import io
+from tax_engine import capital_gains_tax
+from tax_tables import DEFAULT_TAX_YEAR, available_tax_years, get_tax_tables
 
-# Estate Duty Rates (2025)
-ESTATE_DUTY_ABATEMENT = 3500000
-ESTATE_DUTY_RATE_1 = 0.20
-ESTATE_DUTY_RATE_2 = 0.25
-ESTATE_DUTY_THRESHOLD = 30000000
 EXECUTOR_FEE_RATE_DEFAULT = 0.035  # South African standard (3.5%)
-CGT_INCLUSION_RATE = 0.40
-CGT_EXCLUSION_DEATH = 300000
 
-def calculate_estate_duty(net_value, has_surviving_spouse, spouse_bequest_value, pbo_bequest_value):
+def calculate_estate_duty(net_value, has_surviving_spouse, spouse_bequest_value, pbo_bequest_value, tax_year=DEFAULT_TAX_YEAR):
     """Calculate estate duty based on net estate value and deductions."""
+    tables = get_tax_tables(tax_year)
     dutiable_value = max(0, net_value - spouse_bequest_value - pbo_bequest_value)
-    dutiable_value = max(0, dutiable_value - ESTATE_DUTY_ABATEMENT)
+    dutiable_value = max(0, dutiable_value - tables.estate_duty_abatement)
     if dutiable_value <= 0:
         return 0
-    if dutiable_value <= ESTATE_DUTY_THRESHOLD:
-        estate_duty = dutiable_value * ESTATE_DUTY_RATE_1
+    if dutiable_value <= tables.estate_duty_threshold:
+        estate_duty = dutiable_value * tables.estate_duty_rate
     else:
-        estate_duty = (ESTATE_DUTY_THRESHOLD * ESTATE_DUTY_RATE_1) + ((dutiable_value - ESTATE_DUTY_THRESHOLD) * ESTATE_DUTY_RATE_2)
+        estate_duty = (tables.estate_duty_threshold * tables.estate_duty_rate) + ((dutiable_value - tables.estate_duty_threshold) * tables.estate_duty_upper_rate)
     if has_surviving_spouse:
         return 0
     return estate_duty
 
-def calculate_cgt(assets, marginal_tax_rate):
-    """Calculate Capital Gains Tax on assets at death."""
+def calculate_cgt(assets, annual_income, age, tax_year=DEFAULT_TAX_YEAR):
+    """Calculate Capital Gains Tax on assets at death, on top of the deceased's other income for the year."""
     total_gain = 0
     for asset in assets:
         gain = max(0, asset["market_value"] - asset["base_cost"])
         total_gain += gain
-    taxable_gain = max(0, total_gain - CGT_EXCLUSION_DEATH)
-    taxable_amount = taxable_gain * CGT_INCLUSION_RATE
-    cgt = taxable_amount * marginal_tax_rate
+    cgt = capital_gains_tax(total_gain, annual_income, age, at_death=True, tax_year=tax_year)
     return cgt
 
 def calculate_executor_fees(gross_value, executor_fee_rate):
@@ -69,7 +63,13 @@ def show():
         marital_status = st.selectbox("Marital Status", ["Single", "Married in Community of Property", "Married Out of Community (No Accrual)", "Married Out of Community (With Accrual)"])
     with status_col:
         has_surviving_spouse = st.checkbox("Surviving spouse?", value=False)
-        st.caption("2025 SA estate duty rules: R3.5M abatement, 20% up to R30M, 25% thereafter.")
+        tax_years = available_tax_years()
+        tax_year = st.selectbox("Tax Year", tax_years, index=tax_years.index(DEFAULT_TAX_YEAR))
+        tables = get_tax_tables(tax_year)
+        st.caption(
+            f"{tax_year} SA estate duty rules: R{tables.estate_duty_abatement / 1e6:.1f}M abatement, "
+            f"{tables.estate_duty_rate:.0%} up to R{tables.estate_duty_threshold / 1e6:.0f}M, {tables.estate_duty_upper_rate:.0%} thereafter."
+        )
 
     st.write("**Liquid Assets**")
     cash = st.number_input("Cash in Bank/Savings (R)", min_value=0.0, step=1000.0, format="%.0f")
@@ -99,17 +99,22 @@ def show():
         pbo_bequest_value = st.number_input("Bequests to Public Benefit Organizations (R)", min_value=0.0, step=1000.0, format="%.0f")
 
     st.write("**Assumptions**")
-    marginal_tax_rate = st.number_input("Marginal Tax Rate for CGT (e.g., 0.45 for 45%)", min_value=0.0, max_value=0.45, value=0.45, step=0.01)
+    annual_income = st.number_input(
+        "Taxable Income in Year of Death (R)", min_value=0.0, step=1000.0, format="%.0f",
+        value=float(snapshot.get("household_income", 0)) * 12,
+        help="CGT is taxed at the client's own marginal rates, so the gain is stacked on this income.",
+    )
+    age = int(snapshot.get("age", 0))
     executor_fee_rate = st.number_input("Executor Fee Rate (%)", min_value=0.0, max_value=10.0, value=EXECUTOR_FEE_RATE_DEFAULT * 100, step=0.1) / 100
     if st.button("Calculate Estate Liquidity", type="primary"):
-        if cash < 0 or life_insurance_to_estate < 0 or any(p < 0 for p in properties) or any(i["market_value"] < 0 or i["base_cost"] < 0 for i in investments) or other_assets < 0 or debts < 0 or medical_bills < 0 or cash_bequests < 0 or spouse_bequest_value < 0 or pbo_bequest_value < 0 or marginal_tax_rate < 0 or marginal_tax_rate > 0.45 or executor_fee_rate < 0:
-            st.error("All financial inputs must be non-negative, marginal tax rate must be between 0 and 45%, and executor fee rate must be non-negative.")
+        if cash < 0 or life_insurance_to_estate < 0 or any(p < 0 for p in properties) or any(i["market_value"] < 0 or i["base_cost"] < 0 for i in investments) or other_assets < 0 or debts < 0 or medical_bills < 0 or cash_bequests < 0 or spouse_bequest_value < 0 or pbo_bequest_value < 0 or annual_income < 0 or executor_fee_rate < 0:
+            st.error("All financial inputs and the executor fee rate must be non-negative.")
         else:
             try:
                 gross_estate = cash + life_insurance_to_estate + sum(properties) + sum(i["market_value"] for i in investments) + other_assets
                 net_estate = gross_estate - debts - medical_bills - cash_bequests
-                cgt = calculate_cgt(investments, marginal_tax_rate)
-                estate_duty = calculate_estate_duty(net_estate, has_surviving_spouse, spouse_bequest_value, pbo_bequest_value)
+                cgt = calculate_cgt(investments, annual_income, age, tax_year)
+                estate_duty = calculate_estate_duty(net_estate, has_surviving_spouse, spouse_bequest_value, pbo_bequest_value, tax_year)
                 executor_fees = calculate_executor_fees(gross_estate, executor_fee_rate)
                 total_costs = cgt + estate_duty + executor_fees
                 liquid_assets = cash + life_insurance_to_estate
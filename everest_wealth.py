@@ -2,67 +2,499 @@ import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
 import io
+import functools
+import json
+import os
+import sqlite3
+from contextlib import closing
+from types import MappingProxyType
+from typing import NamedTuple
+import numpy as np
+from quote_ledger import QUOTE_LEDGER_PATH, REPORT_KEYS, commission_totals, connect_ledger, record_quote
+from tax_tables import DEFAULT_TAX_YEAR, get_tax_tables
 
-# Constants for Everest Wealth Products
-ONYX_INCOME_PLUS_RATE = 0.142  # 14.2% annual return
-STRATEGIC_INCOME_RATE = 0.128  # 12.8% annual return
-DIVIDEND_TAX_RATE = 0.20  # 20% dividend tax
-TERM_YEARS = 5
-STRATEGIC_INCOME_BONUS = 0.10  # 10% special dividend bonus at the end of term
-ONYX_BROKER_COMMISSION = 0.04  # 4% commission for Onyx Income Plus
-STRATEGIC_BROKER_COMMISSION = 0.05  # 5% commission for Strategic Income
+# Rates, commission, bonus and term for each product live in the catalog file, one entry per rate vintage
+PRODUCT_CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "everest_products.json")
+PRODUCT_TERMS = ("annual_rate", "broker_commission", "end_of_term_bonus", "term_years")
 MINIMUM_INVESTMENT = 100000  # R100,000 minimum
 INVESTMENT_INCREMENT = 5000  # Must be divisible by R5,000
+MAXIMUM_QUOTE_AMOUNT = 50000000  # Top of the precomputed quote ladder
+MAXIMUM_HORIZON_YEARS = 30  # Longest run of rollovers the reinvestment ledger simulates
+MONEY_MARKET_NET_RATE = 0.06  # Money-market proxy yield after interest tax
+REINVESTMENT_TARGETS = {"product": "Same product", "money_market": "Money-market proxy"}
+LEDGER_FIELDS = ("income", "reinvested", "paid_out", "product_capital", "money_market")
+QUOTE_FIELDS = (
+    "gross_monthly_income", "gross_annual_return", "gross_total_return", "net_monthly_income",
+    "net_annual_return", "net_total_return", "broker_fee", "special_bonus", "net_bonus",
+)
+QUOTE_DTYPE = np.dtype([("investment_amount", np.float64)] + [(field, np.float64) for field in QUOTE_FIELDS])
+RATE_CARD_COLUMNS = {
+    "investment_amount": "Investment Amount (R)",
+    "gross_monthly_income": "Gross Monthly Income (R)",
+    "net_monthly_income": "Net Monthly Income (R)",
+    "net_annual_return": "Net Annual Return (R)",
+    "net_total_return": "Net Total Return Over Term (R)",
+    "net_bonus": "Special Dividend Bonus (Net) (R)",
+    "broker_fee": "Broker Fee (R)",
+}
+COMPARISON_COLUMNS = {
+    "product": "Product",
+    "vintage": "Vintage",
+    "annual_rate": "Annual Rate",
+    "term_years": "Term (years)",
+    "end_of_term_bonus": "Bonus at Term",
+    "net_monthly_income": "Net Monthly Income (R)",
+    "net_total_return": "Net Total Return Over Term (R)",
+    "broker_fee": "Broker Fee (R)",
+}
+SENSITIVITY_AXES = {
+    "dividend_tax_rate": "Dividend Tax",
+    "broker_commission": "Broker Commission",
+    "annual_rate": "Annual Rate",
+}
+SENSITIVITY_STEPS = {"dividend_tax_rate": 50, "broker_commission": 10, "annual_rate": 50}
+SENSITIVITY_METRICS = {
+    "net_total_return": "Net Total Return Over Term (R)",
+    "net_monthly_income": "Net Monthly Income (R)",
+}
 
-def calculate_investment_results(investment_amount, product):
-    """Calculate gross and net returns for the selected Everest Wealth product."""
-    # Determine the annual rate and broker commission based on the product
-    if product == "Onyx Income Plus":
-        annual_rate = ONYX_INCOME_PLUS_RATE
-        broker_commission_rate = ONYX_BROKER_COMMISSION
-        special_bonus = 0  # No bonus for Onyx Income Plus
-    else:  # Strategic Income
-        annual_rate = STRATEGIC_INCOME_RATE
-        broker_commission_rate = STRATEGIC_BROKER_COMMISSION
-        special_bonus = investment_amount * STRATEGIC_INCOME_BONUS  # 10% bonus
-
-    # Calculate broker fee
-    broker_fee = investment_amount * broker_commission_rate
-
-    # Gross returns
+
+class ProductCatalog(NamedTuple):
+    """Every product rate vintage in the catalog file, one row each, as read-only columns."""
+    products: tuple
+    vintages: tuple
+    annual_rate: np.ndarray
+    broker_commission: np.ndarray
+    end_of_term_bonus: np.ndarray
+    term_years: np.ndarray
+    rows: MappingProxyType  # (product, vintage) -> row
+    latest: MappingProxyType  # product -> row of its newest vintage
+
+
+@functools.lru_cache(maxsize=None)
+def load_product_catalog(path=PRODUCT_CATALOG_PATH):
+    """Load and compile the product catalog; memoized so every quote shares the same arrays."""
+    with open(path) as f:
+        raw = json.load(f)
+    entries = [
+        (product["name"], vintage)
+        for product in raw["products"]
+        for vintage in sorted(product["vintages"], key=lambda vintage: vintage["vintage"])
+    ]
+    columns = {}
+    for term in PRODUCT_TERMS:
+        columns[term] = np.array([vintage[term] for _, vintage in entries], dtype=np.float64)
+        columns[term].setflags(write=False)
+    rows = {(name, vintage["vintage"]): row for row, (name, vintage) in enumerate(entries)}
+    return ProductCatalog(
+        products=tuple(name for name, _ in entries),
+        vintages=tuple(vintage["vintage"] for _, vintage in entries),
+        rows=MappingProxyType(rows),
+        # Vintages are sorted within each product, so the last row seen is the newest
+        latest=MappingProxyType({name: row for (name, _), row in rows.items()}),
+        **columns,
+    )
+
+def product_names():
+    """Products in catalog order."""
+    return tuple(load_product_catalog().latest)
+
+def product_vintages(product):
+    """Rate vintages of one product, oldest first."""
+    catalog = load_product_catalog()
+    return tuple(vintage for name, vintage in catalog.rows if name == product)
+
+def product_terms(product, vintage=None):
+    """Rate, commission, bonus and term for a product vintage (the newest by default)."""
+    catalog = load_product_catalog()
+    row = catalog.latest.get(product) if vintage is None else catalog.rows.get((product, vintage))
+    if row is None:
+        raise ValueError(f"No Everest Wealth product {product!r} (vintage {vintage or 'latest'}). Available: {', '.join(product_names())}")
+    terms = {term: float(getattr(catalog, term)[row]) for term in PRODUCT_TERMS}
+    terms["term_years"] = int(terms["term_years"])
+    terms["vintage"] = catalog.vintages[row]
+    return terms
+
+def _quote_columns(investment_amount, annual_rate, broker_commission, end_of_term_bonus, term_years, dividend_tax_rate):
+    """Quote fields for any broadcastable mix of amounts and product terms."""
+    investment_amount = np.asarray(investment_amount, dtype=np.float64)
+    special_bonus = investment_amount * end_of_term_bonus
     gross_annual_return = investment_amount * annual_rate
     gross_monthly_income = gross_annual_return / 12
-    gross_total_return = (gross_annual_return * TERM_YEARS) + special_bonus  # Include bonus for Strategic Income
-
-    # Net returns after dividend tax
-    net_monthly_income = gross_monthly_income * (1 - DIVIDEND_TAX_RATE)
+    net_monthly_income = gross_monthly_income * (1 - dividend_tax_rate)
     net_annual_return = net_monthly_income * 12
-    net_bonus = special_bonus * (1 - DIVIDEND_TAX_RATE) if special_bonus > 0 else 0
-    net_total_return = (net_annual_return * TERM_YEARS) + net_bonus  # Include net bonus
-
+    net_bonus = special_bonus * (1 - dividend_tax_rate)
     return {
         "gross_monthly_income": gross_monthly_income,
         "gross_annual_return": gross_annual_return,
-        "gross_total_return": gross_total_return,
+        "gross_total_return": (gross_annual_return * term_years) + special_bonus,
         "net_monthly_income": net_monthly_income,
         "net_annual_return": net_annual_return,
-        "net_total_return": net_total_return,
-        "broker_fee": broker_fee,
+        "net_total_return": (net_annual_return * term_years) + net_bonus,
+        "broker_fee": investment_amount * broker_commission,
         "special_bonus": special_bonus,
         "net_bonus": net_bonus,
     }
 
+def calculate_investment_results(investment_amount, product, tax_year=DEFAULT_TAX_YEAR, vintage=None):
+    """Calculate gross and net returns for the selected Everest Wealth product."""
+    terms = product_terms(product, vintage)
+    results = _quote_columns(
+        investment_amount, terms["annual_rate"], terms["broker_commission"], terms["end_of_term_bonus"],
+        terms["term_years"], get_tax_tables(tax_year).dividend_tax_rate,
+    )
+    return {field: float(value) for field, value in results.items()}
+
+def compare_products(investment_amount, tax_year=DEFAULT_TAX_YEAR, all_vintages=False):
+    """Value every catalog product for one amount in a single vectorized pass, best net total return first.
+
+    Uses the newest vintage of each product unless all_vintages is set.
+    """
+    catalog = load_product_catalog()
+    rows = np.arange(len(catalog.products)) if all_vintages else np.fromiter(catalog.latest.values(), dtype=np.intp)
+    results = _quote_columns(
+        investment_amount, catalog.annual_rate[rows], catalog.broker_commission[rows], catalog.end_of_term_bonus[rows],
+        catalog.term_years[rows], get_tax_tables(tax_year).dividend_tax_rate,
+    )
+    comparison = pd.DataFrame({
+        "product": [catalog.products[row] for row in rows],
+        "vintage": [catalog.vintages[row] for row in rows],
+        **{term: getattr(catalog, term)[rows] for term in PRODUCT_TERMS},
+        **results,
+    })
+    comparison["term_years"] = comparison["term_years"].astype(int)
+    return comparison.sort_values("net_total_return", ascending=False, kind="stable").reset_index(drop=True)
+
+@functools.lru_cache(maxsize=None)
+def quote_grid(product, tax_year=DEFAULT_TAX_YEAR, vintage=None):
+    """Every valid quote from R100,000 to R50M in R5,000 steps, computed in one vectorized pass.
+
+    Same formulas as calculate_investment_results, held as one read-only structured array per
+    product vintage and tax year (about 10k rows, under 1 MB), so quote_lookup is an index into it.
+    """
+    terms = product_terms(product, vintage)
+    grid = np.empty((MAXIMUM_QUOTE_AMOUNT - MINIMUM_INVESTMENT) // INVESTMENT_INCREMENT + 1, dtype=QUOTE_DTYPE)
+    amounts = np.arange(MINIMUM_INVESTMENT, MAXIMUM_QUOTE_AMOUNT + INVESTMENT_INCREMENT, INVESTMENT_INCREMENT, dtype=np.float64)
+    results = _quote_columns(
+        amounts, terms["annual_rate"], terms["broker_commission"], terms["end_of_term_bonus"],
+        terms["term_years"], get_tax_tables(tax_year).dividend_tax_rate,
+    )
+    for field in QUOTE_FIELDS:
+        grid[field] = results[field]
+    grid["investment_amount"] = amounts
+    grid.setflags(write=False)
+    return grid
+
+def quote_lookup(investment_amount, product, tax_year=DEFAULT_TAX_YEAR, vintage=None):
+    """Quote for one amount: an O(1) index into quote_grid, with a direct calculation off the ladder."""
+    index, remainder = divmod(investment_amount - MINIMUM_INVESTMENT, INVESTMENT_INCREMENT)
+    grid = quote_grid(product, tax_year, vintage)
+    if remainder or not 0 <= index < len(grid):
+        return calculate_investment_results(investment_amount, product, tax_year, vintage)
+    row = grid[int(index)]
+    return {field: float(row[field]) for field in QUOTE_FIELDS}
+
+@functools.lru_cache(maxsize=None)
+def rate_card_excel(product, tax_year=DEFAULT_TAX_YEAR, vintage=None):
+    """Full rate card for a product as Excel bytes, built once and reused for every download."""
+    terms = product_terms(product, vintage)
+    grid = quote_grid(product, tax_year, vintage)
+    rate_card = pd.DataFrame({label: grid[field] for field, label in RATE_CARD_COLUMNS.items()})
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
+        rate_card.to_excel(writer, index=False, sheet_name="Rate Card")
+        sheet = writer.sheets["Rate Card"]
+        sheet.set_column(0, len(RATE_CARD_COLUMNS) - 1, 22, writer.book.add_format({"num_format": "#,##0.00"}))
+        sheet.freeze_panes(1, 0)
+        sheet.repeat_rows(0)
+        sheet.fit_to_pages(1, 0)
+        pd.DataFrame({
+            "Notes": [
+                f"{product} rate card ({terms['vintage']} rates), {terms['annual_rate']:.1%} a year over a {terms['term_years']}-year term, {tax_year} dividend tax of {get_tax_tables(tax_year).dividend_tax_rate:.0%}.",
+                f"Amounts from R{MINIMUM_INVESTMENT:,} to R{MAXIMUM_QUOTE_AMOUNT:,} in R{INVESTMENT_INCREMENT:,} steps.",
+                "Print setup repeats the header row on every page and fits the columns to the page width.",
+            ]
+        }).to_excel(writer, index=False, sheet_name="Notes")
+    return buffer.getvalue()
+
+def sensitivity_sweep(investment_amount, product, dividend_tax_rates, broker_commissions, annual_rates, vintage=None):
+    """Quote fields for every dividend tax x commission x rate combination in one broadcast pass.
+
+    Each field is a (tax, commission, rate) array; the product's bonus and term stay fixed.
+    """
+    terms = product_terms(product, vintage)
+    dividend_tax_rates = np.asarray(dividend_tax_rates, dtype=np.float64)
+    broker_commissions = np.asarray(broker_commissions, dtype=np.float64)
+    annual_rates = np.asarray(annual_rates, dtype=np.float64)
+    results = _quote_columns(
+        investment_amount, annual_rates[None, None, :], broker_commissions[None, :, None],
+        terms["end_of_term_bonus"], terms["term_years"], dividend_tax_rates[:, None, None],
+    )
+    shape = (len(dividend_tax_rates), len(broker_commissions), len(annual_rates))
+    return {field: np.broadcast_to(value, shape) for field, value in results.items()}
+
+def sensitivity_tornado(sweep, axis_values, base, fields=("net_total_return", "broker_fee")):
+    """Swing in each field as one driver runs across its swept range, the others held at base.
+
+    axis_values are the swept values in sweep order (tax, commission, rate); base maps each
+    SENSITIVITY_AXES key to its current value, snapped to the nearest grid point.
+    """
+    base_index = tuple(int(np.abs(np.asarray(values) - base[axis]).argmin()) for axis, values in zip(SENSITIVITY_AXES, axis_values))
+    rows = []
+    for i, (axis, values) in enumerate(zip(SENSITIVITY_AXES, axis_values)):
+        low_index, high_index = list(base_index), list(base_index)
+        low_index[i], high_index[i] = 0, len(values) - 1
+        row = {"driver": SENSITIVITY_AXES[axis], "low_value": float(values[0]), "high_value": float(values[-1])}
+        for field in fields:
+            base_value = sweep[field][base_index]
+            row[f"{field}_low"] = float(sweep[field][tuple(low_index)] - base_value)
+            row[f"{field}_high"] = float(sweep[field][tuple(high_index)] - base_value)
+        rows.append(row)
+    tornado = pd.DataFrame(rows)
+    tornado["swing"] = (tornado[f"{fields[0]}_high"] - tornado[f"{fields[0]}_low"]).abs()
+    return tornado.sort_values("swing", kind="stable").reset_index(drop=True)
+
+def reinvestment_ledger(product, reinvestment_ratios, horizon_years=None, target="product",
+                        money_market_rate=MONEY_MARKET_NET_RATE, tax_year=DEFAULT_TAX_YEAR, vintage=None):
+    """Monthly cash-flow ledger per R1 invested, one column per reinvestment ratio.
+
+    Net income (and the net bonus at the end of each term) is split between payout and
+    reinvestment. Reinvested income tops up the product capital from the next month, or earns
+    the money-market proxy rate. At each term end the whole product balance rolls into a
+    new term, and that balance is the bonus base for the term. Fields are
+    (months, ratios) arrays; every cash flow is proportional to the amount invested.
+    """
+    terms = product_terms(product, vintage)
+    horizon_years = terms["term_years"] if horizon_years is None else horizon_years
+    if not 0 < horizon_years <= MAXIMUM_HORIZON_YEARS:
+        raise ValueError(f"Horizon must be between 1 and {MAXIMUM_HORIZON_YEARS} years, got {horizon_years}.")
+    if target not in REINVESTMENT_TARGETS:
+        raise ValueError(f"Unknown reinvestment target {target!r}. Use one of: {', '.join(REINVESTMENT_TARGETS)}")
+    net_share = 1 - get_tax_tables(tax_year).dividend_tax_rate
+    ratios = np.clip(np.atleast_1d(np.asarray(reinvestment_ratios, dtype=np.float64)), 0, 1)
+    months, term_months = int(round(horizon_years * 12)), terms["term_years"] * 12
+    monthly_rate = terms["annual_rate"] / 12
+    money_market_growth = (1 + money_market_rate) ** (1 / 12) - 1
+
+    ledger = {field: np.empty((months, len(ratios))) for field in LEDGER_FIELDS}
+    capital = np.ones_like(ratios)
+    term_capital = np.ones_like(ratios)
+    money_market = np.zeros_like(ratios)
+    for month in range(months):
+        income = capital * monthly_rate * net_share
+        term_end = (month + 1) % term_months == 0
+        if term_end:
+            income = income + term_capital * terms["end_of_term_bonus"] * net_share
+        reinvested = income * ratios
+        money_market = money_market * (1 + money_market_growth)
+        if target == "product":
+            capital = capital + reinvested
+        else:
+            money_market = money_market + reinvested
+        if term_end:
+            term_capital = capital
+        for field, value in zip(LEDGER_FIELDS, (income, reinvested, income - reinvested, capital, money_market)):
+            ledger[field][month] = value
+    ledger["cumulative_paid_out"] = np.cumsum(ledger["paid_out"], axis=0)
+    ledger["total_wealth"] = ledger["product_capital"] + ledger["money_market"] + ledger["cumulative_paid_out"]
+    return ledger
+
+def reinvestment_outcomes(investment_amounts, reinvestment_ratios, product, horizon_years=None, target="product",
+                          money_market_rate=MONEY_MARKET_NET_RATE, tax_year=DEFAULT_TAX_YEAR, vintage=None):
+    """Outcome at the horizon for every amount x reinvestment ratio pair, as (amounts, ratios) arrays.
+
+    The ledger runs once per ratio for R1 and is scaled across the amounts by broadcasting.
+    """
+    ledger = reinvestment_ledger(product, reinvestment_ratios, horizon_years, target, money_market_rate, tax_year, vintage)
+    amounts = np.atleast_1d(np.asarray(investment_amounts, dtype=np.float64))[:, None]
+    outcomes = {
+        "product_capital": amounts * ledger["product_capital"][-1],
+        "money_market": amounts * ledger["money_market"][-1],
+        "total_paid_out": amounts * ledger["cumulative_paid_out"][-1],
+        "total_wealth": amounts * ledger["total_wealth"][-1],
+    }
+    outcomes["total_return"] = outcomes["total_wealth"] - amounts
+    return outcomes
+
+def show_reinvestment_panel(investment_amount, product, terms):
+    """Reinvest part of the net income and roll the product over for up to 30 years."""
+    r1, r2, r3 = st.columns(3)
+    with r1:
+        target = st.radio("Reinvest Into", list(REINVESTMENT_TARGETS), format_func=REINVESTMENT_TARGETS.get, key="everest_reinvest_target")
+    with r2:
+        ratio = st.slider("Share of Net Income Reinvested (%)", 0, 100, 50, 5, key="everest_reinvest_ratio") / 100
+    with r3:
+        num_terms = st.slider(
+            f"Terms ({terms['term_years']} years each)", 1, MAXIMUM_HORIZON_YEARS // terms["term_years"], 1, key="everest_reinvest_terms"
+        )
+    money_market_rate = MONEY_MARKET_NET_RATE
+    if target == "money_market":
+        money_market_rate = st.number_input(
+            "Money-Market Yield After Tax (%)", 0.0, 20.0, MONEY_MARKET_NET_RATE * 100, 0.25, key="everest_reinvest_mm"
+        ) / 100
+    horizon_years = num_terms * terms["term_years"]
+    ratios = np.unique(np.append(np.linspace(0, 1, 5), ratio))
+    ledger = reinvestment_ledger(product, ratios, horizon_years, target, money_market_rate, vintage=terms["vintage"])
+    outcomes = reinvestment_outcomes(investment_amount, ratios, product, horizon_years, target, money_market_rate, vintage=terms["vintage"])
+    chosen = int(np.searchsorted(ratios, ratio))
+
+    k1, k2, k3 = st.columns(3)
+    k1.metric(f"Total wealth after {horizon_years} years", f"R {outcomes['total_wealth'][0, chosen]:,.0f}")
+    k2.metric("Paid out to client", f"R {outcomes['total_paid_out'][0, chosen]:,.0f}")
+    k3.metric("Gain vs paying everything out", f"R {outcomes['total_wealth'][0, chosen] - outcomes['total_wealth'][0, 0]:,.0f}")
+
+    months = np.arange(1, len(ledger["income"]) + 1) / 12
+    ledger_fig = go.Figure()
+    for field, name, color in (
+        ("product_capital", f"{product} capital", "#3a60d1"),
+        ("money_market", "Money-market balance", "#f59e0b"),
+        ("cumulative_paid_out", "Cumulative income paid out", "#10b981"),
+    ):
+        ledger_fig.add_trace(go.Scatter(
+            x=months, y=investment_amount * ledger[field][:, chosen], name=name, stackgroup="wealth",
+            line=dict(color=color, width=1), hovertemplate=f"{name}: R%{{y:,.0f}}<extra></extra>",
+        ))
+    ledger_fig.add_trace(go.Scatter(
+        x=months, y=investment_amount * ledger["total_wealth"][:, 0], name="Paying everything out",
+        line=dict(color="#0f172a", width=2, dash="dash"), hovertemplate="Paying out: R%{y:,.0f}<extra></extra>",
+    ))
+    ledger_fig.update_layout(
+        title=f"Monthly ledger at {ratio:.0%} reinvested",
+        xaxis_title="Years",
+        yaxis_title="Amount (R)",
+        hovermode="x unified",
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="#f8fafc",
+        font={'color': "#0f172a"},
+        height=400,
+        margin=dict(l=40, r=20, t=60, b=50),
+    )
+    st.plotly_chart(ledger_fig, use_container_width=True)
+
+    ratio_df = pd.DataFrame({
+        "Reinvested": [f"{value:.0%}" for value in ratios],
+        "Total Wealth (R)": outcomes["total_wealth"][0],
+        "Paid Out (R)": outcomes["total_paid_out"][0],
+        "Product Capital (R)": outcomes["product_capital"][0],
+        "Money Market (R)": outcomes["money_market"][0],
+    })
+    st.dataframe(ratio_df.style.format({column: "R {:,.0f}" for column in ratio_df.columns[1:]}), use_container_width=True, hide_index=True)
+    st.caption(
+        "Income paid out is counted at face value. Reinvested product income earns the product rate from the "
+        "next month, and each rollover carries the whole balance into a new term with its bonus."
+    )
+
+def show_sensitivity_panel(investment_amount, product, terms):
+    """Dividend tax x commission x rate sweep for the current quote, redrawn live as the sliders move."""
+    base = {
+        "dividend_tax_rate": get_tax_tables().dividend_tax_rate,
+        "broker_commission": terms["broker_commission"],
+        "annual_rate": terms["annual_rate"],
+    }
+    s1, s2, s3 = st.columns(3)
+    with s1:
+        tax_range = st.slider("Dividend Tax Range (%)", 0.0, 45.0, (10.0, 30.0), 0.5, key="everest_sens_tax")
+    with s2:
+        commission_range = st.slider("Commission Range (%)", 0.0, 10.0, (0.0, 8.0), 0.25, key="everest_sens_commission")
+    with s3:
+        rate_center = round(terms["annual_rate"] * 200) / 2
+        rate_range = st.slider("Annual Rate Range (%)", 0.0, 25.0, (max(0.0, rate_center - 3), rate_center + 3), 0.5, key="everest_sens_rate")
+    metric = st.selectbox("Heatmap Metric", list(SENSITIVITY_METRICS), format_func=SENSITIVITY_METRICS.get, key="everest_sens_metric")
+    axis_values = tuple(
+        np.linspace(low, high, SENSITIVITY_STEPS[axis]) / 100
+        for axis, (low, high) in zip(SENSITIVITY_AXES, (tax_range, commission_range, rate_range))
+    )
+    sweep = sensitivity_sweep(investment_amount, product, *axis_values, terms["vintage"])
+    tax_values, _, rate_values = axis_values
+
+    # Commission is paid by Everest, not the client, so any commission slice shows the same client returns
+    fig_heat = go.Figure(go.Heatmap(
+        x=rate_values * 100, y=tax_values * 100, z=sweep[metric][:, 0, :], colorscale="RdYlGn",
+        colorbar=dict(title="R"),
+        hovertemplate="Dividend tax: %{y:.1f}%<br>Annual rate: %{x:.1f}%<br>Value: R%{z:,.0f}<extra></extra>",
+    ))
+    fig_heat.add_trace(go.Scatter(
+        x=[base["annual_rate"] * 100], y=[base["dividend_tax_rate"] * 100], mode="markers",
+        marker=dict(color="#0f172a", size=12, symbol="x"), name="Current quote"
+    ))
+    fig_heat.update_layout(
+        title=SENSITIVITY_METRICS[metric],
+        xaxis_title="Annual Rate (%)",
+        yaxis_title="Dividend Tax (%)",
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="#f8fafc",
+        font={'color': "#0f172a"},
+        height=420,
+        margin=dict(l=40, r=20, t=60, b=50),
+    )
+    st.plotly_chart(fig_heat, use_container_width=True)
+
+    tornado = sensitivity_tornado(sweep, axis_values, base)
+    labels = [f"{row.driver} {row.low_value:.1%}-{row.high_value:.1%}" for row in tornado.itertuples()]
+    fig_tornado = go.Figure()
+    for field, name, color in (("net_total_return", "Net total return", "#3a60d1"), ("broker_fee", "Broker fee", "#10b981")):
+        fig_tornado.add_trace(go.Bar(
+            y=labels, x=tornado[f"{field}_high"] - tornado[f"{field}_low"], base=tornado[f"{field}_low"],
+            orientation="h", name=name, marker_color=color,
+            customdata=tornado[[f"{field}_low", f"{field}_high"]].to_numpy(),
+            hovertemplate="%{y}<br>Change: R%{customdata[0]:,.0f} to R%{customdata[1]:,.0f}<extra></extra>",
+        ))
+    fig_tornado.update_layout(
+        title="Swing from the current quote across each range",
+        xaxis_title="Change vs current quote (R)",
+        barmode="group",
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="#f8fafc",
+        font={'color': "#0f172a"},
+        height=340,
+        margin=dict(l=40, r=20, t=60, b=50),
+    )
+    st.plotly_chart(fig_tornado, use_container_width=True)
+    st.caption(
+        f"{sweep[metric].size:,} scenarios from one broadcast array. Bars run from each driver's low to high value "
+        "with the other two at the current quote; commission moves only the broker fee."
+    )
+
+def show_commission_report():
+    """Broker fee totals from the quote ledger, grouped by advisor, product and/or month."""
+    by = st.multiselect("Group By", list(REPORT_KEYS), default=["advisor", "month"], format_func=str.title, key="everest_ledger_by")
+    if not os.path.exists(QUOTE_LEDGER_PATH):
+        st.info("No quotes recorded yet.")
+        return
+    try:
+        with closing(connect_ledger()) as connection:
+            totals = commission_totals(connection, by)
+    except sqlite3.Error as e:
+        st.warning(f"Commission report unavailable: the quote ledger could not be read ({e}).")
+        return
+    if totals["quotes"].isna().all():
+        st.info("No quotes recorded yet.")
+        return
+    k1, k2 = st.columns(2)
+    k1.metric("Quotes recorded", f"{int(totals['quotes'].sum()):,}")
+    k2.metric("Broker fees quoted", f"R {totals['broker_fee'].sum():,.0f}")
+    st.dataframe(
+        totals.rename(columns={"quotes": "Quotes", "investment_amount": "Amount Quoted (R)", "broker_fee": "Broker Fee (R)"})
+        .rename(columns=str.title)
+        .style.format({"Amount Quoted (R)": "R {:,.0f}", "Broker Fee (R)": "R {:,.2f}"}),
+        use_container_width=True,
+        hide_index=True,
+    )
+
 def show():
     snapshot = st.session_state.get("client_snapshot", {})
     client_name = snapshot.get("client_name", "")
 
+    catalog_terms = {name: product_terms(name) for name in product_names()}
+    rate_summary = ", ".join(f"{terms['annual_rate']:.1%} over {terms['term_years']} years ({name})" for name, terms in catalog_terms.items())
+    bonus_products = [name for name, terms in catalog_terms.items() if terms["end_of_term_bonus"] > 0]
     st.markdown(
-        """
+        f"""
         <div class="nav-card">
             <h3>Everest Wealth | Quick Quote</h3>
             <p style="color: var(--muted);">
-                Present Onyx Income Plus or Strategic Income with clear gross/net income, broker fee and the Strategic bonus.
-                Rates set to current marketing: 14.2% (Onyx), 12.8% (Strategic) over 5 years with 20% dividend tax.
+                Present any Everest Wealth product with clear gross/net income, broker fee and any end-of-term bonus.
+                Rates from the product catalog: {rate_summary}, with {get_tax_tables().dividend_tax_rate:.0%} dividend tax.
             </p>
         </div>
         """,
@@ -74,10 +506,14 @@ def show():
         return
 
     st.markdown(f"**Client:** {client_name}")
+    advisor = st.text_input("Advisor", key="advisor_name", help="Recorded with every quote for commission reporting.")
 
     left, right = st.columns(2)
     with left:
-        product = st.selectbox("Select Everest Wealth Product", ["Onyx Income Plus", "Strategic Income"])
+        product = st.selectbox("Select Everest Wealth Product", product_names())
+        vintages = product_vintages(product)
+        vintage = st.selectbox("Rate Vintage", vintages, index=len(vintages) - 1) if len(vintages) > 1 else vintages[-1]
+        terms = product_terms(product, vintage)
     with right:
         investment_amount = st.number_input(
             "Investment Amount (R)",
@@ -87,25 +523,67 @@ def show():
             help="Minimum investment is R100,000, and the amount must be divisible by R5,000.",
             format="%.0f",
         )
-        st.caption("All returns shown net of 20% dividend tax. Strategic Income includes the 10% bonus at term.")
+        st.caption(f"All returns shown net of {get_tax_tables().dividend_tax_rate:.0%} dividend tax ({DEFAULT_TAX_YEAR})."
+                   + "".join(f" {name} includes a {catalog_terms[name]['end_of_term_bonus']:.0%} bonus at term." for name in bonus_products))
 
     # Validate that the investment amount is divisible by 5,000
     if investment_amount % INVESTMENT_INCREMENT != 0:
         st.error(f"Investment amount must be divisible by R{INVESTMENT_INCREMENT:,}. For example, R{investment_amount - (investment_amount % INVESTMENT_INCREMENT):,} or R{(investment_amount + INVESTMENT_INCREMENT - (investment_amount % INVESTMENT_INCREMENT)):,}.")
         return
 
+    with st.expander(f"Compare all products at R{investment_amount:,.0f}"):
+        comparison = compare_products(investment_amount, all_vintages=st.checkbox("Include older rate vintages"))
+        comparison_df = comparison[list(COMPARISON_COLUMNS)].rename(columns=COMPARISON_COLUMNS)
+        st.dataframe(
+            comparison_df.style.format({
+                "Annual Rate": "{:.1%}",
+                "Bonus at Term": "{:.0%}",
+                "Net Monthly Income (R)": "R {:,.2f}",
+                "Net Total Return Over Term (R)": "R {:,.2f}",
+                "Broker Fee (R)": "R {:,.2f}",
+            }),
+            use_container_width=True,
+            hide_index=True,
+        )
+        st.caption("Ranked by net total return over each product's term, after dividend tax.")
+
+    with st.expander(f"{product} rate card: every amount from R{MINIMUM_INVESTMENT:,} to R{MAXIMUM_QUOTE_AMOUNT:,}"):
+        st.caption(f"{len(quote_grid(product, vintage=vintage)):,} quotes in R{INVESTMENT_INCREMENT:,} steps, precomputed once and print-ready.")
+        # The workbook takes about a second to build, so only build it when asked (then it is cached)
+        prepared_key = f"everest_rate_card_{product}_{vintage}"
+        if st.button("Prepare Rate Card for Download", key=f"{prepared_key}_button"):
+            st.session_state[prepared_key] = True
+        if st.session_state.get(prepared_key):
+            st.download_button(
+                label="Download Rate Card as Excel",
+                data=rate_card_excel(product, vintage=vintage),
+                file_name=f"everest_{product.lower().replace(' ', '_')}_rate_card.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            )
+
+    with st.expander("Reinvestment and rollovers: compound the income for up to 30 years"):
+        show_reinvestment_panel(investment_amount, product, terms)
+
+    with st.expander("Sensitivity sweep: dividend tax, commission and rate"):
+        show_sensitivity_panel(investment_amount, product, terms)
+
     if st.button("Calculate Investment Returns"):
         if investment_amount < MINIMUM_INVESTMENT:
             st.error(f"Investment amount must be at least R{MINIMUM_INVESTMENT:,}.")
         else:
             try:
                 # Calculate results
-                results = calculate_investment_results(investment_amount, product)
+                results = quote_lookup(investment_amount, product, vintage=vintage)
+                try:
+                    with closing(connect_ledger()) as connection:
+                        record_quote(connection, advisor or "Unassigned", client_name, product, terms["vintage"], DEFAULT_TAX_YEAR, investment_amount, results)
+                except sqlite3.Error as e:
+                    st.warning(f"Quote not saved to the ledger: {e}")
 
                 # Display summary
                 st.success("--- Everest Wealth Investment Summary ---")
                 st.write(f"**Client**: {client_name}")
-                st.write(f"**Product**: {product}")
+                st.write(f"**Product**: {product} ({terms['vintage']} rates)")
                 st.write(f"**Investment Amount**: R {investment_amount:,.2f}")
 
                 k1, k2, k3 = st.columns(3)
@@ -191,14 +669,14 @@ def show():
                 )
                 st.plotly_chart(fig, use_container_width=True)
 
-                # Cumulative returns over the five-year term
-                years = list(range(1, TERM_YEARS + 1))
+                # Cumulative returns over the product's term
+                years = list(range(1, terms["term_years"] + 1))
                 gross_cumulative = []
                 net_cumulative = []
                 for year in years:
                     gross_total = results["gross_annual_return"] * year
                     net_total = results["net_annual_return"] * year
-                    if product == "Strategic Income" and year == TERM_YEARS:
+                    if year == terms["term_years"]:
                         gross_total += results["special_bonus"]
                         net_total += results["net_bonus"]
                     gross_cumulative.append(gross_total)
@@ -247,9 +725,9 @@ def show():
                 )
                 st.plotly_chart(mix_fig, use_container_width=True)
 
-                # Additional note for Strategic Income
-                if product == "Strategic Income":
-                    st.write(f"**Note**: Strategic Income includes a special dividend bonus of R {results['special_bonus']:,.2f} (Net: R {results['net_bonus']:,.2f} after 20% dividend tax) at the end of the term.")
+                # Additional note for products with an end-of-term bonus
+                if terms["end_of_term_bonus"] > 0:
+                    st.write(f"**Note**: {product} includes a special dividend bonus of R {results['special_bonus']:,.2f} (Net: R {results['net_bonus']:,.2f} after {get_tax_tables().dividend_tax_rate:.0%} dividend tax) at the end of the term.")
 
                 # Downloadable summary
                 buffer = io.BytesIO()
@@ -274,5 +752,8 @@ def show():
             except Exception as e:
                 st.error(f"Error: {e}")
 
+    with st.expander("Commission report: every quote recorded in the ledger"):
+        show_commission_report()
+
 if __name__ == "__main__":
     show()
@@ -0,0 +1,199 @@
+"""Headless payroll run for a corporate employee schedule.
+
+Usage:
+    python payroll_batch.py employees.csv payroll.parquet --payslips payslips/ --workers 8
+
+The employee file has one row per employee (employee_id, gross_salary, pension_contribution,
+age, num_dependants; optional employee_name and medical_contributions). Amounts are annual rands.
+The file is read and written in chunks so memory stays flat however long the schedule is. Input
+may be CSV or Parquet; results go to CSV, Parquet or XLSX based on the output extension. With
+--payslips, one PDF per employee is rendered on a process pool into that folder.
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import xlsxwriter
+from fpdf import FPDF
+
+from advisor_brief import pdf_safe
+from salary_calculator import SALARY_TAX_FIELDS, calculate_salary_tax_array
+from tax_tables import DEFAULT_TAX_YEAR
+
+EMPLOYEE_DEFAULTS = {
+    "pension_contribution": 0.0,
+    "medical_contributions": 0.0,
+    "num_dependants": 0,
+}
+# Every chunk is cast to these column types so CSV, Parquet and XLSX output stay consistent
+PAYROLL_COLUMNS = {
+    "employee_id": str,
+    "employee_name": str,
+    "gross_salary": np.float64,
+    "gross_salary_monthly": np.float64,
+    **{field: np.float64 for field in SALARY_TAX_FIELDS},
+}
+PAYSLIP_LINES = (
+    ("Gross monthly salary", "gross_salary_monthly"),
+    ("Taxable income (annual)", "taxable_income"),
+    ("PAYE before medical credits", "paye_before_mtc_monthly"),
+    ("Medical tax credits", "mtc_monthly"),
+    ("PAYE", "paye_monthly"),
+    ("UIF (employee)", "uif_monthly"),
+    ("Net monthly pay", "net_income_monthly"),
+)
+
+
+def read_employee_chunks(path, chunk_size):
+    """Yield the employee file as DataFrames of at most chunk_size rows."""
+    if str(path).lower().endswith((".parquet", ".pq")):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+def payroll_chunk(employees, tax_year=DEFAULT_TAX_YEAR):
+    """PAYE, UIF, medical credits and net pay for one chunk of employees."""
+    employees = employees.assign(**{k: employees.get(k, v) for k, v in EMPLOYEE_DEFAULTS.items()}).reset_index(drop=True)
+    employees = employees.fillna({k: v for k, v in EMPLOYEE_DEFAULTS.items()})
+    taxes = calculate_salary_tax_array(
+        employees["gross_salary"].to_numpy(dtype=np.float64),
+        employees["pension_contribution"].to_numpy(dtype=np.float64),
+        employees["age"].to_numpy(),
+        employees["medical_contributions"].to_numpy(dtype=np.float64),
+        employees["num_dependants"].to_numpy(),
+        tax_year,
+    )
+    results = pd.DataFrame({
+        "employee_id": employees["employee_id"].astype(str),
+        "employee_name": employees.get("employee_name", pd.Series("", index=employees.index)).fillna("").astype(str),
+        "gross_salary": employees["gross_salary"],
+        "gross_salary_monthly": employees["gross_salary"] / 12,
+    })
+    for field in SALARY_TAX_FIELDS:
+        results[field] = taxes[field]
+    return results.astype(PAYROLL_COLUMNS)
+
+
+class PayrollWriter:
+    """Append payroll chunks to a CSV, Parquet or XLSX file without holding the whole run."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.kind = os.path.splitext(self.path)[1].lower()
+        self.rows = 0
+        self._parquet = None
+        self._workbook = None
+        self._sheet = None
+
+    def write(self, chunk):
+        if self.kind in (".parquet", ".pq"):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            if self._parquet is None:
+                schema = pa.schema([(name, pa.string() if kind is str else pa.float64()) for name, kind in PAYROLL_COLUMNS.items()])
+                self._parquet = pq.ParquetWriter(self.path, schema)
+            self._parquet.write_table(pa.Table.from_pandas(chunk, schema=self._parquet.schema, preserve_index=False))
+        elif self.kind == ".xlsx":
+            if self._workbook is None:
+                # constant_memory flushes each row to disk as soon as the next one starts
+                self._workbook = xlsxwriter.Workbook(self.path, {"constant_memory": True})
+                self._sheet = self._workbook.add_worksheet("Payroll")
+                self._sheet.write_row(0, 0, list(chunk.columns))
+            for offset, row in enumerate(chunk.itertuples(index=False), start=self.rows + 1):
+                self._sheet.write_row(offset, 0, row)
+        else:
+            chunk.to_csv(self.path, mode="w" if self.rows == 0 else "a", header=self.rows == 0, index=False)
+        self.rows += len(chunk)
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+        if self._workbook is not None:
+            self._workbook.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def build_payslip_pdf(payslip, tax_year=DEFAULT_TAX_YEAR):
+    """Render one employee's monthly payslip as PDF bytes."""
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Helvetica", "B", 16)
+    pdf.cell(0, 10, "Payslip", ln=1)
+    pdf.set_font("Helvetica", "", 12)
+    name = payslip.get("employee_name")
+    if name is None or pd.isna(name) or name == "":
+        name = payslip["employee_id"]
+    pdf.cell(0, 8, pdf_safe(f"Employee: {name} | ID: {payslip['employee_id']} | Tax year: {tax_year}"), ln=1)
+    pdf.ln(4)
+    for label, key in PAYSLIP_LINES:
+        pdf.set_font("Helvetica", "B", 11)
+        pdf.cell(80, 8, f"{label}:")
+        pdf.set_font("Helvetica", "", 11)
+        pdf.cell(0, 8, f"R {payslip[key]:,.2f}", ln=1)
+    pdf.set_font("Helvetica", "", 11)
+    pdf.cell(0, 8, f"Marginal tax rate: {payslip['marginal_rate'] * 100:.1f}%", ln=1)
+    return bytes(pdf.output())
+
+
+def write_payslip(payslip, folder, tax_year=DEFAULT_TAX_YEAR):
+    """Write one payslip PDF into folder and return its path."""
+    path = os.path.join(folder, f"payslip_{str(payslip['employee_id']).replace(os.sep, '_')}.pdf")
+    with open(path, "wb") as f:
+        f.write(build_payslip_pdf(payslip, tax_year))
+    return path
+
+
+def run_payroll(employees_path, output_path, payslip_dir=None, chunk_size=5000, workers=None, tax_year=DEFAULT_TAX_YEAR):
+    """Stream the employee file through the PAYE engine, chunk by chunk, and return the row count."""
+    pool = None
+    if payslip_dir:
+        os.makedirs(payslip_dir, exist_ok=True)
+        if workers != 1:
+            pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        with PayrollWriter(output_path) as writer:
+            for employees in read_employee_chunks(employees_path, chunk_size):
+                results = payroll_chunk(employees, tax_year)
+                writer.write(results)
+                if payslip_dir:
+                    payslips = results.to_dict("records")
+                    folders = [payslip_dir] * len(payslips)
+                    years = [tax_year] * len(payslips)
+                    if pool is None:
+                        list(map(write_payslip, payslips, folders, years))
+                    else:
+                        # Drain each chunk before reading the next so queued payslips stay bounded
+                        list(pool.map(write_payslip, payslips, folders, years, chunksize=64))
+            return writer.rows
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk payroll run for an employee schedule.")
+    parser.add_argument("employees", help="CSV/Parquet file with one row per employee")
+    parser.add_argument("output", help="Results file (.csv, .parquet or .xlsx)")
+    parser.add_argument("--payslips", help="Folder to write one payslip PDF per employee")
+    parser.add_argument("--tax-year", default=DEFAULT_TAX_YEAR)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+    rows = run_payroll(args.employees, args.output, args.payslips, args.chunk_size, args.workers, args.tax_year)
+    print(f"Processed {rows:,} employees to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
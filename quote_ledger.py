@@ -0,0 +1,190 @@
+"""Append-only ledger of every Everest Wealth quote and the broker fee it carries.
+
+Usage:
+    python quote_ledger.py --by advisor month
+    python quote_ledger.py --by product --advisor "J Smith" --from 2025-03 --to 2026-02
+
+Quotes are stored in one local SQLite file (data/quote_ledger.sqlite by default). Each insert also
+adds to a commission rollup keyed by advisor, product and month, so commission totals are read from
+a table with one row per key rather than a scan of every quote.
+
+Commission is enforced in the schema, not in this module: triggers reject any UPDATE or DELETE on
+quotes and any DELETE on commission_rollup. They also reject any rollup INSERT or UPDATE that does
+not add exactly the newest quote to its key. Each rollup row records the last quote it absorbed, so
+only the quotes_rollup trigger, firing as that quote is inserted, can pass. verify_rollup
+recomputes the totals from quotes as an audit.
+"""
+import argparse
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+
+import pandas as pd
+
+QUOTE_LEDGER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "quote_ledger.sqlite")
+QUOTE_COLUMNS = (
+    "quoted_at", "month", "advisor", "client", "product", "vintage", "tax_year",
+    "investment_amount", "broker_fee", "net_total_return",
+)
+REPORT_KEYS = ("advisor", "product", "month")
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS quotes (
+    quote_id INTEGER PRIMARY KEY,
+    quoted_at TEXT NOT NULL,
+    month TEXT NOT NULL,
+    advisor TEXT NOT NULL,
+    client TEXT NOT NULL,
+    product TEXT NOT NULL,
+    vintage TEXT NOT NULL,
+    tax_year TEXT NOT NULL,
+    investment_amount REAL NOT NULL,
+    broker_fee REAL NOT NULL,
+    net_total_return REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS quotes_advisor_month ON quotes (advisor, month);
+
+CREATE TABLE IF NOT EXISTS commission_rollup (
+    advisor TEXT NOT NULL,
+    product TEXT NOT NULL,
+    month TEXT NOT NULL,
+    quotes INTEGER NOT NULL,
+    investment_amount REAL NOT NULL,
+    broker_fee REAL NOT NULL,
+    last_quote_id INTEGER NOT NULL,
+    PRIMARY KEY (advisor, product, month)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS commission_rollup_product ON commission_rollup (product, month);
+CREATE INDEX IF NOT EXISTS commission_rollup_month ON commission_rollup (month);
+
+CREATE TRIGGER IF NOT EXISTS quotes_rollup AFTER INSERT ON quotes BEGIN
+    INSERT INTO commission_rollup VALUES (NEW.advisor, NEW.product, NEW.month, 1, NEW.investment_amount, NEW.broker_fee, NEW.quote_id)
+    ON CONFLICT (advisor, product, month) DO UPDATE SET
+        quotes = quotes + 1,
+        investment_amount = investment_amount + excluded.investment_amount,
+        broker_fee = broker_fee + excluded.broker_fee,
+        last_quote_id = excluded.last_quote_id;
+END;
+CREATE TRIGGER IF NOT EXISTS commission_rollup_insert BEFORE INSERT ON commission_rollup
+WHEN NEW.quotes <> 1 OR NOT EXISTS (
+    SELECT 1 FROM quotes
+    WHERE quote_id = NEW.last_quote_id AND quote_id = (SELECT MAX(quote_id) FROM quotes)
+        AND advisor = NEW.advisor AND product = NEW.product AND month = NEW.month
+        AND investment_amount = NEW.investment_amount AND broker_fee = NEW.broker_fee
+)
+BEGIN
+    SELECT RAISE(ABORT, 'commission_rollup is maintained by the quotes_rollup trigger only');
+END;
+CREATE TRIGGER IF NOT EXISTS commission_rollup_update BEFORE UPDATE ON commission_rollup
+WHEN NEW.advisor IS NOT OLD.advisor OR NEW.product IS NOT OLD.product OR NEW.month IS NOT OLD.month
+    OR NEW.quotes <> OLD.quotes + 1 OR NEW.last_quote_id <= OLD.last_quote_id OR NOT EXISTS (
+        SELECT 1 FROM quotes
+        WHERE quote_id = NEW.last_quote_id AND quote_id = (SELECT MAX(quote_id) FROM quotes)
+            AND advisor = NEW.advisor AND product = NEW.product AND month = NEW.month
+            AND NEW.investment_amount = OLD.investment_amount + investment_amount
+            AND NEW.broker_fee = OLD.broker_fee + broker_fee
+    )
+BEGIN
+    SELECT RAISE(ABORT, 'commission_rollup is maintained by the quotes_rollup trigger only');
+END;
+CREATE TRIGGER IF NOT EXISTS commission_rollup_no_delete BEFORE DELETE ON commission_rollup BEGIN
+    SELECT RAISE(ABORT, 'commission_rollup is maintained by the quotes_rollup trigger only');
+END;
+CREATE TRIGGER IF NOT EXISTS quotes_no_update BEFORE UPDATE ON quotes BEGIN
+    SELECT RAISE(ABORT, 'the quote ledger is append-only');
+END;
+CREATE TRIGGER IF NOT EXISTS quotes_no_delete BEFORE DELETE ON quotes BEGIN
+    SELECT RAISE(ABORT, 'the quote ledger is append-only');
+END;
+"""
+
+
+def connect_ledger(path=QUOTE_LEDGER_PATH):
+    """Open the ledger, creating the file and schema on first use."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def quote_row(advisor, client, product, vintage, tax_year, investment_amount, quote, quoted_at=None):
+    """One ledger row from an everest_wealth quote dict."""
+    quoted_at = quoted_at or datetime.now().isoformat(timespec="seconds")
+    return (
+        quoted_at, quoted_at[:7], advisor, client, product, vintage, tax_year,
+        float(investment_amount), float(quote["broker_fee"]), float(quote["net_total_return"]),
+    )
+
+
+def record_quotes(connection, rows):
+    """Append quote rows (see quote_row) in one transaction and return how many were written."""
+    with connection:
+        cursor = connection.executemany(
+            f"INSERT INTO quotes ({', '.join(QUOTE_COLUMNS)}) VALUES ({', '.join('?' * len(QUOTE_COLUMNS))})", rows
+        )
+    return cursor.rowcount
+
+
+def record_quote(connection, advisor, client, product, vintage, tax_year, investment_amount, quote, quoted_at=None):
+    """Append one quote to the ledger."""
+    return record_quotes(connection, [quote_row(advisor, client, product, vintage, tax_year, investment_amount, quote, quoted_at)])
+
+
+def commission_totals(connection, by=REPORT_KEYS, advisor=None, product=None, start_month=None, end_month=None):
+    """Quote count, amount quoted and broker fees grouped by any of advisor, product and month.
+
+    Months are "YYYY-MM" and the range is inclusive. Reads the rollup, so the cost depends on
+    the number of advisor/product/month keys, not the number of quotes.
+    """
+    by = tuple(by)
+    unknown = set(by) - set(REPORT_KEYS)
+    if unknown:
+        raise ValueError(f"Cannot group commission by {', '.join(sorted(unknown))}. Use any of: {', '.join(REPORT_KEYS)}")
+    filters, params = [], []
+    for clause, value in (("advisor = ?", advisor), ("product = ?", product), ("month >= ?", start_month), ("month <= ?", end_month)):
+        if value is not None:
+            filters.append(clause)
+            params.append(value)
+    columns = ", ".join(by)
+    query = (
+        f"SELECT {columns + ', ' if by else ''}SUM(quotes) AS quotes, SUM(investment_amount) AS investment_amount, "
+        f"SUM(broker_fee) AS broker_fee FROM commission_rollup"
+        + (f" WHERE {' AND '.join(filters)}" if filters else "")
+        + (f" GROUP BY {columns} ORDER BY {columns}" if by else "")
+    )
+    return pd.read_sql_query(query, connection, params=params)
+
+
+def verify_rollup(connection, tolerance=0.005):
+    """Rollup keys whose count or totals differ from a full recomputation over quotes (empty if consistent)."""
+    keys = list(REPORT_KEYS)
+    ledger = pd.read_sql_query(
+        "SELECT advisor, product, month, COUNT(*) AS quotes, SUM(investment_amount) AS investment_amount, "
+        "SUM(broker_fee) AS broker_fee FROM quotes GROUP BY advisor, product, month",
+        connection,
+    )
+    rollup = pd.read_sql_query("SELECT advisor, product, month, quotes, investment_amount, broker_fee FROM commission_rollup", connection)
+    merged = ledger.merge(rollup, on=keys, how="outer", suffixes=("_ledger", "_rollup")).fillna(0)
+    mismatched = merged["quotes_ledger"] != merged["quotes_rollup"]
+    for column in ("investment_amount", "broker_fee"):
+        mismatched |= (merged[f"{column}_ledger"] - merged[f"{column}_rollup"]).abs() > tolerance
+    return merged[mismatched].reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Commission totals from the Everest quote ledger.")
+    parser.add_argument("--ledger", default=QUOTE_LEDGER_PATH, help="Ledger SQLite file")
+    parser.add_argument("--by", nargs="*", default=list(REPORT_KEYS), choices=REPORT_KEYS, help="Columns to group by")
+    parser.add_argument("--advisor")
+    parser.add_argument("--product")
+    parser.add_argument("--from", dest="start_month", help="First month, YYYY-MM")
+    parser.add_argument("--to", dest="end_month", help="Last month, YYYY-MM")
+    args = parser.parse_args()
+    with closing(connect_ledger(args.ledger)) as connection:
+        totals = commission_totals(connection, args.by, args.advisor, args.product, args.start_month, args.end_month)
+    print(totals.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
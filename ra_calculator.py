@@ -1,39 +1,85 @@
 import streamlit as st
 import pandas as pd
 import io
+import numpy as np
+from tax_engine import age_rebate, bracket_tax, evaluate_household, marginal_rate, medical_tax_credits
+from tax_tables import DEFAULT_TAX_YEAR, available_tax_years, get_tax_tables
 
-# Tax Rates and Rebates (2024/2025)
-TAX_BRACKETS = [
-    (0, 237100, 0.18, 0),
-    (237101, 370500, 0.26, 42678),
-    (370501, 512800, 0.31, 77362),
-    (512801, 673000, 0.36, 121475),
-    (673001, 857900, 0.39, 179147),
-    (857901, 1817000, 0.41, 251258),
-    (1817001, float('inf'), 0.45, 644489)
-]
-REBATES = {
-    "primary": 17235,
-    "secondary": 9444,
-    "tertiary": 3145
-}
-
-def get_tax_rate(income):
-    """Return the marginal tax rate based on annual taxable income (2024/2025 rates)."""
-    for lower, upper, rate, base_tax in TAX_BRACKETS:
-        if lower <= income <= upper:
-            return rate
-    return 0.45
-
-def calculate_ra_rebate(income, contribution):
+def calculate_ra_rebate(income, contribution, tax_year=DEFAULT_TAX_YEAR):
     """Calculate the tax rebate for RA contributions and excess carryover."""
-    max_deductible = min(income * 0.275, 350000)
-    deductible = min(contribution, max_deductible)
-    excess = max(0, contribution - max_deductible)
-    tax_rate = get_tax_rate(income)
+    deductible = evaluate_household(income, contribution, tax_year=tax_year).retirement_deduction
+    excess = max(0, contribution - deductible)
+    tax_rate = float(marginal_rate(income, tax_year))
     rebate = deductible * tax_rate
     return deductible, tax_rate, rebate, excess
 
+def _tax_due(taxable_income, age, num_dependants, tax_year):
+    """Annual tax after rebates and medical credits (array version for the planner)."""
+    tax_before_rebates = bracket_tax(taxable_income, tax_year)[0]
+    return np.maximum(0, tax_before_rebates - age_rebate(age, tax_year) - medical_tax_credits(num_dependants, tax_year))
+
+def simulate_ra_carry_forward(incomes, contributions, carried_forward=0, age=0, num_dependants=0, tax_year=DEFAULT_TAX_YEAR):
+    """Roll RA contributions through consecutive tax years with SARS carry-forward of the excess.
+
+    incomes and contributions are clients x years arrays. Each year the carried-forward excess plus
+    the new contribution is deducted up to 27.5% of income (capped); whatever is left carries to the
+    next year. The same tax tables are assumed for every year. Returns a dict of clients x years arrays
+    (deductible, carried_forward at year end, rebate = tax saved) and total_rebate per client.
+    """
+    tables = get_tax_tables(tax_year)
+    incomes = np.atleast_2d(np.asarray(incomes, dtype=np.float64))
+    contributions = np.broadcast_to(np.asarray(contributions, dtype=np.float64), incomes.shape)
+    age = np.asarray(age).reshape(-1, 1)
+    num_dependants = np.asarray(num_dependants).reshape(-1, 1)
+    limits = np.minimum(incomes * tables.retirement_deduction_rate, tables.retirement_deduction_cap)
+    deductible = np.empty_like(incomes)
+    closing = np.empty_like(incomes)
+    carry = np.broadcast_to(np.asarray(carried_forward, dtype=np.float64), incomes.shape[:1]).copy()
+    for year in range(incomes.shape[1]):
+        available = carry + contributions[:, year]
+        deductible[:, year] = np.minimum(available, limits[:, year])
+        carry = available - deductible[:, year]
+        closing[:, year] = carry
+    rebate = _tax_due(incomes, age, num_dependants, tax_year) - _tax_due(incomes - deductible, age, num_dependants, tax_year)
+    return {"deductible": deductible, "carried_forward": closing, "rebate": rebate, "total_rebate": rebate.sum(axis=1)}
+
+def optimize_ra_schedule(incomes, budget, carried_forward=0, age=0, num_dependants=0, tax_year=DEFAULT_TAX_YEAR):
+    """Spread an RA budget over the coming tax years to maximise the total tax saved; returns the schedule and its carry-forward results."""
+    tables = get_tax_tables(tax_year)
+    incomes = np.atleast_2d(np.asarray(incomes, dtype=np.float64))
+    clients, years = incomes.shape
+    age = np.asarray(age).reshape(-1, 1)
+    num_dependants = np.asarray(num_dependants).reshape(-1, 1)
+    carry_only = simulate_ra_carry_forward(incomes, 0, carried_forward, age, num_dependants, tax_year)
+    taxable = incomes - carry_only["deductible"]
+    room = np.minimum(incomes * tables.retirement_deduction_rate, tables.retirement_deduction_cap) - carry_only["deductible"]
+
+    # Deduction amounts at which the saving rate changes, per client and year
+    threshold = (age_rebate(age, tax_year) + medical_tax_credits(num_dependants, tax_year))[..., None]
+    zero_tax = np.clip(tables.bracket_lower + (threshold - tables.bracket_base_tax) / tables.bracket_rate, tables.bracket_lower, tables.bracket_upper)
+    bounds = tables.bracket_lower
+    kinks = taxable[..., None] - np.concatenate([np.broadcast_to(bounds, (clients, years, len(bounds))), np.broadcast_to(zero_tax, (clients, years, zero_tax.shape[-1]))], axis=2)
+    points = np.sort(np.clip(np.concatenate([np.zeros_like(room)[..., None], room[..., None], kinks], axis=2), 0, room[..., None]), axis=2)
+    width = np.diff(points, axis=2)
+    # Statutory rate at each slice's midpoint; differencing the rounded base tax instead gives the
+    # one-rand gaps between brackets a zero rate
+    midpoint = taxable[..., None] - (points[..., :-1] + points[..., 1:]) / 2
+    taxed = _tax_due(midpoint, age[..., None], num_dependants[..., None], tax_year) > 0
+    rate = np.where(taxed, bracket_tax(midpoint, tax_year)[1], 0)
+
+    # Fill the best slices first with each client's budget
+    rate, width = rate.reshape(clients, -1), width.reshape(clients, -1)
+    order = np.argsort(-rate, axis=1, kind="stable")
+    sorted_width = np.take_along_axis(width, order, 1)
+    filled_before = np.cumsum(sorted_width, axis=1) - sorted_width
+    budget = np.broadcast_to(np.asarray(budget, dtype=np.float64), (clients,))[:, None]
+    fill = np.empty_like(width)
+    np.put_along_axis(fill, order, np.clip(budget - filled_before, 0, sorted_width), axis=1)
+    contributions = fill.reshape(clients, years, -1).sum(axis=2)
+    plan = simulate_ra_carry_forward(incomes, contributions, carried_forward, age, num_dependants, tax_year)
+    plan["contributions"] = contributions
+    return plan
+
 def show():
     snapshot = st.session_state.get("client_snapshot", {})
     client_name = snapshot.get("client_name", "")
@@ -63,7 +109,40 @@ def show():
         income = st.number_input("Annual Pensionable Income (R)", min_value=0.0, step=1000.0, format="%.0f", value=default_annual_income)
     with col_right:
         contribution = st.number_input("Annual RA Contribution (R)", min_value=0.0, step=1000.0, format="%.0f")
-        st.caption("Assumptions: 2024/2025 marginal rates. Confirm caps if new SARS tables apply.")
+        tax_years = available_tax_years()
+        tax_year = st.selectbox("Tax Year", tax_years, index=tax_years.index(DEFAULT_TAX_YEAR))
+        tables = get_tax_tables(tax_year)
+        st.caption(f"Assumptions: {tax_year} marginal rates and deduction cap.")
+
+    with st.expander("Multi-year plan: spread contributions and use carried-forward excess"):
+        p1, p2 = st.columns(2)
+        with p1:
+            plan_years = st.slider("Tax Years to Plan", 1, 10, 5)
+            income_growth = st.slider("Annual Income Growth (%)", 0.0, 15.0, 6.0, step=0.5) / 100
+        with p2:
+            plan_budget = st.number_input("Total RA Budget Over the Period (R)", min_value=0.0, step=10000.0, format="%.0f", value=contribution * plan_years)
+            prior_excess = st.number_input("Excess Carried Forward From Prior Years (R)", min_value=0.0, step=1000.0, format="%.0f")
+        age = int(snapshot.get("age", 0))
+        num_dependants = int(snapshot.get("dependants", 0))
+        plan_incomes = income * (1 + income_growth) ** np.arange(plan_years)
+        plan = optimize_ra_schedule(plan_incomes, plan_budget, prior_excess, age, num_dependants, tax_year)
+        even = simulate_ra_carry_forward(plan_incomes, plan_budget / plan_years, prior_excess, age, num_dependants, tax_year)
+        m1, m2, m3 = st.columns(3)
+        m1.metric("Tax saved (optimised)", f"R {plan['total_rebate'][0]:,.0f}")
+        m2.metric("Tax saved (even spread)", f"R {even['total_rebate'][0]:,.0f}")
+        m3.metric("Budget not needed", f"R {max(0, plan_budget - plan['contributions'].sum()):,.0f}")
+        st.dataframe(
+            pd.DataFrame({
+                "Year": np.arange(1, plan_years + 1),
+                "Income (R)": plan_incomes,
+                "Contribution (R)": plan["contributions"][0],
+                "Deductible (R)": plan["deductible"][0],
+                "Carried Forward (R)": plan["carried_forward"][0],
+                "Tax Saved (R)": plan["rebate"][0],
+            }).style.format({"Year": "{:d}", **{c: "R {:,.0f}" for c in ("Income (R)", "Contribution (R)", "Deductible (R)", "Carried Forward (R)", "Tax Saved (R)")}}),
+            hide_index=True,
+        )
+        st.caption("Contributions go to the years with the highest marginal saving; budget beyond the 27.5% caps is left uninvested rather than stranded as excess. Current tax tables are assumed for every year.")
 
     if st.button("Calculate Rebate", type="primary"):
         if income < 0 or contribution < 0:
@@ -71,9 +150,9 @@ def show():
         else:
             try:
                 deductible, tax_rate, rebate, excess = calculate_ra_rebate(
-                    income, contribution
+                    income, contribution, tax_year
                 )
-                max_deductible = min(income * 0.275, 350000)
+                max_deductible = min(income * tables.retirement_deduction_rate, tables.retirement_deduction_cap)
                 remaining_space = max(0, max_deductible - contribution)
 
                 k1, k2, k3 = st.columns(3)
@@ -89,7 +168,7 @@ def show():
                             Income: R {income:,.0f} • Contribution: R {contribution:,.0f}
                         </p>
                         <ul>
-                            <li>Deductible cap (27.5%, max R350,000): R {max_deductible:,.0f}</li>
+                            <li>Deductible cap ({tables.retirement_deduction_rate * 100:.1f}%, max R{tables.retirement_deduction_cap:,.0f}): R {max_deductible:,.0f}</li>
                             <li>Room before cap: R {remaining_space:,.0f}</li>
                             <li>Excess carried to next year: R {excess:,.0f}</li>
                         </ul>
@@ -0,0 +1,197 @@
+"""Headless retirement projections for a whole client book.
+
+Usage:
+    python retirement_batch.py clients.csv provisions.csv results.parquet --workers 8
+
+The clients file has one row per client (client_id, current_age, retirement_age,
+desired_monthly_income, inflation_rate, annual_increase, assumed_return, preserve_capital,
+preservation_years). The provisions file has one row per provision (client_id, current_value,
+annual_return, monthly_contribution, contribution_increase). Rates are decimals (0.07 = 7%).
+Either file may be CSV or Parquet; the results file format follows its extension.
+years_until_depletion is blank when capital is preserved or lasts beyond age 100. For
+preserve-capital clients with a shortfall, the goal-seek columns give the extra monthly
+contribution, the contribution escalation on existing provisions, or the retirement age
+(up to 80) that closes the gap.
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from retirement_calculator import (
+    calculate_retirement_plan,
+    future_value_array,
+    required_contribution_increase,
+    required_monthly_contribution,
+    required_retirement_age,
+    simulate_depletion_paths,
+)
+
+CLIENT_DEFAULTS = {
+    "annual_increase": 0.0,
+    "inflation_rate": 0.06,
+    "assumed_return": 0.07,
+    "preserve_capital": False,
+    "preservation_years": 0,
+}
+PROVISION_DEFAULTS = {
+    "monthly_contribution": 0.0,
+    "contribution_increase": 0.0,
+}
+DEPLETION_HORIZON_AGE = 100
+
+
+def read_table(path):
+    """Read a CSV or Parquet file into a DataFrame based on its extension."""
+    if str(path).lower().endswith((".parquet", ".pq")):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
+def write_table(df, path):
+    """Write a DataFrame to CSV or Parquet based on the file extension."""
+    if str(path).lower().endswith((".parquet", ".pq")):
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+
+
+def provision_matrices(client_ids, provisions):
+    """Zero-padded clients x provisions arrays for the goal-seek solvers."""
+    positions = provisions["client_id"].map(dict(zip(client_ids, range(len(client_ids)))))
+    provisions = provisions[positions.notna()]
+    positions = positions[positions.notna()].astype(int).to_numpy()
+    slots = provisions.groupby("client_id").cumcount().to_numpy()
+    width = int(slots.max()) + 1 if len(slots) else 1
+    matrices = {}
+    for column in ("current_value", "annual_return", "monthly_contribution", "contribution_increase"):
+        matrix = np.zeros((len(client_ids), width))
+        matrix[positions, slots] = provisions[column].to_numpy()
+        matrices[column] = matrix
+    return matrices
+
+
+def project_chunk(clients, provisions):
+    """Project retirement capital, shortfall and depletion for one chunk of clients."""
+    clients = clients.assign(**{k: clients.get(k, v) for k, v in CLIENT_DEFAULTS.items()}).reset_index(drop=True)
+    provisions = provisions.assign(**{k: provisions.get(k, v) for k, v in PROVISION_DEFAULTS.items()})
+    years_to_retirement = (clients["retirement_age"] - clients["current_age"]).clip(lower=0).astype(int)
+
+    # Value every provision in the chunk with one vectorized call
+    provision_years = provisions["client_id"].map(dict(zip(clients["client_id"], years_to_retirement))).fillna(0)
+    provisions = provisions.assign(
+        future_value=future_value_array(
+            provisions["current_value"].to_numpy(),
+            provisions["annual_return"].to_numpy(),
+            provision_years.to_numpy(),
+            provisions["monthly_contribution"].to_numpy(),
+            provisions["contribution_increase"].to_numpy(),
+        ),
+        weight=provisions["current_value"] + provisions["monthly_contribution"] * 12 * provision_years,
+    )
+    provisions["weighted_return"] = provisions["annual_return"] * provisions["weight"]
+    provisions["weighted_increase"] = provisions["contribution_increase"] * provisions["monthly_contribution"]
+    totals = provisions.groupby("client_id")[
+        ["future_value", "weight", "weighted_return", "monthly_contribution", "weighted_increase"]
+    ].sum()
+    totals = totals.reindex(clients["client_id"]).fillna(0)
+    total_provision_value = totals["future_value"].to_numpy()
+    average_return = np.divide(
+        totals["weighted_return"].to_numpy(), totals["weight"].to_numpy(),
+        out=np.zeros(len(clients)), where=totals["weight"].to_numpy() > 0,
+    )
+
+    plans = [
+        calculate_retirement_plan(
+            row.desired_monthly_income, row.inflation_rate, row.annual_increase, years,
+            bool(row.preserve_capital), int(row.preservation_years), row.assumed_return,
+        )
+        for row, years in zip(clients.itertuples(index=False), years_to_retirement)
+    ]
+    future_annual_income = np.array([plan[0] for plan in plans], dtype=np.float64)
+    capital_required = np.array([np.nan if plan[2] is None else plan[2] for plan in plans], dtype=np.float64)
+    preserve = clients["preserve_capital"].astype(bool).to_numpy()
+
+    # Deterministic drawdown for every depletion client at once (zero volatility, flat income)
+    horizon_years = int(max(DEPLETION_HORIZON_AGE - clients["retirement_age"].min(), 1))
+    depletion_years = simulate_depletion_paths(
+        total_provision_value, future_annual_income, clients["inflation_rate"].to_numpy(),
+        years_to_retirement.to_numpy(), clients["assumed_return"].to_numpy(),
+        return_volatility=0, inflation_volatility=0, num_paths=len(clients),
+        horizon_years=horizon_years, escalate_income=False,
+    )["depletion_years"]
+    outlasts_horizon = depletion_years > DEPLETION_HORIZON_AGE - clients["retirement_age"].to_numpy()
+    depletion_years = np.where(preserve | outlasts_horizon, np.nan, depletion_years)
+
+    shortfall = np.where(preserve, capital_required - total_provision_value, np.nan)
+    contributions = totals["monthly_contribution"].to_numpy()
+    escalation = np.divide(
+        totals["weighted_increase"].to_numpy(), contributions,
+        out=np.zeros(len(clients)), where=contributions > 0,
+    )
+    additional_savings = required_monthly_contribution(np.nan_to_num(shortfall), years_to_retirement.to_numpy(), average_return, escalation)
+    required_increase = np.full(len(clients), np.nan)
+    required_age = np.full(len(clients), np.nan)
+    short = np.flatnonzero(shortfall > 0)
+    if len(short):
+        matrices = provision_matrices(clients["client_id"].iloc[short], provisions)
+        required_increase[short] = required_contribution_increase(
+            capital_required[short], matrices["current_value"], matrices["annual_return"],
+            years_to_retirement.to_numpy()[short], matrices["monthly_contribution"],
+        )
+        short_clients = clients.iloc[short]
+        required_age[short] = required_retirement_age(
+            short_clients["current_age"].to_numpy(), short_clients["desired_monthly_income"].to_numpy(),
+            short_clients["inflation_rate"].to_numpy(), short_clients["annual_increase"].to_numpy(),
+            short_clients["preservation_years"].to_numpy(), short_clients["assumed_return"].to_numpy(),
+            matrices["current_value"], matrices["annual_return"],
+            matrices["monthly_contribution"], matrices["contribution_increase"],
+        )
+    return pd.DataFrame({
+        "client_id": clients["client_id"],
+        "years_to_retirement": years_to_retirement,
+        "future_monthly_income": future_annual_income / 12,
+        "total_provision_value": total_provision_value,
+        "average_return": average_return,
+        "capital_required": capital_required,
+        "capital_shortfall": shortfall,
+        "additional_monthly_savings": additional_savings,
+        "required_contribution_increase": required_increase,
+        "required_retirement_age": required_age,
+        "years_until_depletion": depletion_years,
+    })
+
+
+def project_book(clients, provisions, chunk_size=2000, workers=None):
+    """Split the client book into chunks and project them on a process pool."""
+    chunks = []
+    for start in range(0, len(clients), chunk_size):
+        chunk = clients.iloc[start:start + chunk_size]
+        chunks.append((chunk, provisions[provisions["client_id"].isin(chunk["client_id"])]))
+    if not chunks:
+        return project_chunk(clients, provisions)
+    if workers == 1 or len(chunks) == 1:
+        results = [project_chunk(*chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(project_chunk, *zip(*chunks)))
+    return pd.concat(results, ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch retirement projections for a client book.")
+    parser.add_argument("clients", help="CSV/Parquet file with one row per client")
+    parser.add_argument("provisions", help="CSV/Parquet file with one row per provision")
+    parser.add_argument("output", help="Results file (.csv or .parquet)")
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+    results = project_book(read_table(args.clients), read_table(args.provisions), args.chunk_size, args.workers)
+    write_table(results, args.output)
+    print(f"Projected {len(results):,} clients to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,73 +1,514 @@
 import streamlit as st
 import pandas as pd
+import functools
 import io
 import math
+import os
+import numpy as np
 import plotly.graph_objects as go
 
+HISTORICAL_RETURNS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "historical_returns.csv")
+MIN_BACKTEST_YEARS = 10  # Shortest historical sequence worth replaying as a backtest
+
+def future_value_array(current_value, annual_rate, years, monthly_contribution=0, annual_contribution_increase=0):
+    """Vectorized closed-form future value of provisions with escalating monthly contributions.
+
+    Every argument may be a scalar or a NumPy array; inputs are broadcast together so one
+    call can value many provisions or scenarios. Matches the month-by-month loop: growth is
+    applied annually, each month's contribution compounds at the equivalent monthly rate to
+    year end, and contributions escalate once a year.
+    """
+    current_value = np.asarray(current_value, dtype=np.float64)
+    annual_rate = np.asarray(annual_rate, dtype=np.float64)
+    years = np.maximum(np.asarray(years, dtype=np.float64), 0)
+    monthly_contribution = np.asarray(monthly_contribution, dtype=np.float64)
+    escalation = np.asarray(annual_contribution_increase, dtype=np.float64)
+
+    growth = 1 + annual_rate
+    monthly_rate = growth ** (1 / 12) - 1
+    # Sum of (1 + monthly_rate) ** k for k = 0..11 collapses to annual_rate / monthly_rate
+    safe_monthly = np.where(monthly_rate == 0, 1.0, monthly_rate)
+    year_end_factor = np.where(monthly_rate == 0, 12.0, annual_rate / safe_monthly)
+    annual_deposit = monthly_contribution * year_end_factor
+
+    # Geometric series of escalating deposits: sum of (1 + g) ** y * (1 + r) ** (n - 1 - y)
+    rate_gap = annual_rate - escalation
+    equal_rates = np.abs(rate_gap) < 1e-9
+    safe_gap = np.where(equal_rates, 1.0, rate_gap)
+    deposit_factor = np.where(
+        equal_rates,
+        years * growth ** np.maximum(years - 1, 0),
+        (growth ** years - (1 + escalation) ** years) / safe_gap,
+    )
+    return current_value * growth ** years + annual_deposit * deposit_factor
+
 def calculate_future_value(current_value, annual_rate, years, monthly_contribution=0, annual_contribution_increase=0):
     """Calculate the future value of an investment with monthly contributions and annual increases."""
-    future_value = current_value
-    monthly_rate = (1 + annual_rate) ** (1/12) - 1
-    annual_contributions = monthly_contribution * 12
-    for year in range(years):
-        future_value = future_value * (1 + annual_rate)
-        for month in range(12):
-            monthly_contrib = (annual_contributions / 12) * (1 + monthly_rate) ** (11 - month)
-            future_value += monthly_contrib
-        annual_contributions *= (1 + annual_contribution_increase)
-    return future_value
-
-def calculate_years_until_depletion(capital, annual_income, inflation_rate, years_to_retirement, assumed_return):
-    """Calculate how many years the capital will last with annual withdrawals."""
-    current_capital = capital
-    max_drawdown_rate = 0.175
-    years = 0
-    first_withdrawal = None
-    capital_over_time = [current_capital]
-    withdrawals_over_time = []
-    monthly_income_over_time = []
-    monthly_income_today_value = []
-    while current_capital > 0:
-        if current_capital <= 125000:
-            withdrawals_over_time.append(current_capital)
-            monthly_income = current_capital / 12
-            monthly_income_over_time.append(monthly_income)
-            total_years = years_to_retirement + years + 1
-            inflation_factor = (1 + inflation_rate) ** total_years
-            monthly_income_today = monthly_income / inflation_factor
-            monthly_income_today_value.append(monthly_income_today)
-            years += 1
-            capital_over_time.append(0)
-            withdrawals_over_time.append(0)
-            monthly_income_over_time.append(0)
-            monthly_income_today_value.append(0)
-            break
-        max_withdrawal = current_capital * max_drawdown_rate
-        withdrawal = min(annual_income, max_withdrawal)
-        if years == 0:
-            first_withdrawal = withdrawal
-        current_capital -= withdrawal
-        current_capital = current_capital * (1 + assumed_return)
+    return float(future_value_array(current_value, annual_rate, years, monthly_contribution, annual_contribution_increase))
+
+def _uncapped_capital(capital, annual_income, growth, years):
+    """Capital after each uncapped year: closed form of C(k + 1) = (C(k) - W) * (1 + r)."""
+    years = np.asarray(years, dtype=np.float64)
+    if growth == 1:
+        return capital - years * annual_income
+    steady_state = growth * annual_income / (growth - 1)
+    return steady_state + (capital - steady_state) * growth ** years
+
+def _first_year(estimate, limit, fails):
+    """Round an analytic crossing estimate, then step across the boundary to the first failing year."""
+    years = limit if not math.isfinite(estimate) or estimate < 0 else min(max(math.ceil(estimate), 0), limit)
+    while years > 0 and fails(years - 1):
+        years -= 1
+    while years < limit and not fails(years):
         years += 1
-        capital_over_time.append(max(0, current_capital))
-        withdrawals_over_time.append(withdrawal)
-        monthly_income = withdrawal / 12
-        monthly_income_over_time.append(monthly_income)
-        total_years = years_to_retirement + years
-        inflation_factor = (1 + inflation_rate) ** total_years
-        monthly_income_today = monthly_income / inflation_factor
-        monthly_income_today_value.append(monthly_income_today)
+    return years
+
+def calculate_years_until_depletion(capital, annual_income, inflation_rate, years_to_retirement, assumed_return, max_years=100):
+    """Calculate how many years the capital will last with annual withdrawals.
+
+    While the withdrawal stays under the 17.5% cap the capital follows the annuity recurrence, whose
+    depletion horizon is solved with logarithms; once the cap binds it declines geometrically, solved
+    the same way. Only the year at each boundary is stepped. Capital that outlasts max_years returns
+    years = inf with the series truncated at the horizon. Series are returned as NumPy arrays.
+    """
+    max_drawdown_rate = 0.175
+    final_withdrawal_threshold = 125000
+    if capital <= 0:
+        return 0, None, np.array([capital], dtype=np.float64), np.empty(0), np.empty(0), np.empty(0)
+    growth = 1 + assumed_return
+    limit = max_years + 1
+
+    # Uncapped regime: withdrawal = annual_income while it is within 17.5% of capital
+    def uncapped_fails(year):
+        balance = _uncapped_capital(capital, annual_income, growth, year)
+        return not (balance > final_withdrawal_threshold and annual_income <= balance * max_drawdown_rate)
+
+    threshold = max(annual_income / max_drawdown_rate, final_withdrawal_threshold)
+    if uncapped_fails(0):
+        estimate = 0
+    elif growth == 1:
+        estimate = (capital - threshold) / annual_income if annual_income > 0 else math.inf
+    else:
+        steady_state = growth * annual_income / (growth - 1)
+        ratio = (threshold - steady_state) / (capital - steady_state) if capital != steady_state else -1
+        estimate = math.log(ratio) / math.log(growth) if ratio > 0 else math.inf
+    uncapped_years = _first_year(estimate, limit, uncapped_fails)
+    capital_at_cap = float(_uncapped_capital(capital, annual_income, growth, uncapped_years))
+
+    # Capped regime: withdrawal = 17.5% of capital until the R125,000 final-withdrawal rule applies
+    capped_growth = (1 - max_drawdown_rate) * growth
+    capped_limit = limit - uncapped_years
+    if capital_at_cap <= final_withdrawal_threshold or capped_limit == 0:
+        estimate = 0
+    elif capped_growth >= 1:
+        estimate = math.inf
+    else:
+        estimate = math.log(final_withdrawal_threshold / capital_at_cap) / math.log(capped_growth)
+    capped_years = _first_year(
+        estimate, capped_limit, lambda year: capital_at_cap * capped_growth ** year <= final_withdrawal_threshold
+    )
+
+    normal_years = uncapped_years + capped_years
+    depleted = normal_years < max_years  # the final withdrawal must fall within the horizon
+    size = normal_years + 2 if depleted else limit
+    capital_over_time = np.zeros(size)
+    withdrawals_over_time = np.zeros(size)
+    path_years = min(normal_years + 1, size)
+    capital_over_time[:min(uncapped_years + 1, path_years)] = _uncapped_capital(
+        capital, annual_income, growth, np.arange(min(uncapped_years + 1, path_years))
+    )
+    capped_steps = np.arange(1, path_years - uncapped_years)
+    capital_over_time[uncapped_years + 1:path_years] = capital_at_cap * capped_growth ** capped_steps
+    withdrawals_over_time[:min(uncapped_years, size)] = annual_income
+    withdrawals_over_time[uncapped_years:min(normal_years, size)] = (
+        max_drawdown_rate * capital_at_cap * capped_growth ** np.arange(min(normal_years, size) - uncapped_years)
+    )
+    if depleted:
+        withdrawals_over_time[normal_years] = capital_over_time[normal_years]
+        years = normal_years + 1
+    else:
+        years = math.inf
+    first_withdrawal = float(withdrawals_over_time[0])
+    monthly_income_over_time = withdrawals_over_time / 12
+    inflation_factor = (1 + inflation_rate) ** (years_to_retirement + np.arange(1, size + 1))
+    monthly_income_today_value = monthly_income_over_time / inflation_factor
     return years, first_withdrawal, capital_over_time, withdrawals_over_time, monthly_income_over_time, monthly_income_today_value
 
-def calculate_additional_savings_needed(shortfall, years_to_retirement, average_return):
-    """Calculate additional monthly savings needed to bridge the shortfall."""
-    if shortfall <= 0:
-        return 0
-    annual_rate = average_return
-    fv_factor = ((1 + annual_rate) ** years_to_retirement - 1) / annual_rate
-    annual_savings = shortfall / fv_factor
-    monthly_savings = annual_savings / 12
-    return monthly_savings
+def run_drawdown_paths(capital, annual_income, returns, inflation, years_to_retirement, inflation_rate, escalate_income=True):
+    """Apply the drawdown rules to year-major (years x paths) return and inflation matrices.
+
+    Uses the same rules as calculate_years_until_depletion (17.5% maximum drawdown and the final
+    withdrawal of the balance once capital falls to R125,000). Returns capital balances, real monthly
+    income (today's money) and the depletion year of each path (inf if it survives).
+    """
+    max_drawdown_rate = 0.175
+    final_withdrawal_threshold = 125000
+    horizon_years, num_paths = returns.shape
+    # Income for year t grows with the inflation realised over years 1..t-1; deflate back to today's money
+    income_index = np.ones((horizon_years, num_paths))
+    if escalate_income:
+        income_index[1:] = np.cumprod(1 + inflation[:-1], axis=0)
+    price_index = (1 + inflation_rate) ** years_to_retirement * np.cumprod(1 + inflation, axis=0)
+
+    balances = np.empty((horizon_years + 1, num_paths))
+    real_income = np.empty((horizon_years, num_paths))
+    current_capital = np.broadcast_to(np.asarray(capital, dtype=np.float64), (num_paths,)).copy()
+    balances[0] = current_capital
+    depletion_years = np.where(current_capital > 0, np.inf, 0.0)
+    active = current_capital > 0
+    for year in range(horizon_years):
+        final = active & (current_capital <= final_withdrawal_threshold)
+        withdrawal = np.minimum(annual_income * income_index[year], current_capital * max_drawdown_rate)
+        withdrawal = np.where(final, current_capital, withdrawal)
+        withdrawal = np.where(active, withdrawal, 0)
+        current_capital = np.where(final | ~active, 0, (current_capital - withdrawal) * (1 + returns[year]))
+        depletion_years[final] = year + 1
+        real_income[year] = withdrawal / 12 / price_index[year]
+        balances[year + 1] = current_capital
+        active = active & ~final
+    return balances, real_income, depletion_years
+
+def simulate_depletion_paths(capital, annual_income, inflation_rate, years_to_retirement, assumed_return,
+                             return_volatility=0.12, inflation_volatility=0.015, num_paths=10000,
+                             horizon_years=40, escalate_income=True, seed=None):
+    """Monte Carlo drawdown: run many return/inflation paths as one matrix.
+
+    With escalate_income the withdrawal grows along each path's simulated inflation; otherwise it
+    stays flat like the deterministic path. Paths that survive the horizon count as successes.
+
+    Capital, income, rates and years to retirement may also be arrays of length num_paths, which
+    lets a whole book of clients run as one deterministic matrix with zero volatility.
+    """
+    rng = np.random.default_rng(seed)
+    # Year-major layout keeps each simulated year contiguous across paths
+    returns = np.maximum(rng.normal(assumed_return, return_volatility, (horizon_years, num_paths)), -0.99)
+    inflation = rng.normal(inflation_rate, inflation_volatility, (horizon_years, num_paths))
+    balances, real_income, depletion_years = run_drawdown_paths(
+        capital, annual_income, returns, inflation, years_to_retirement, inflation_rate, escalate_income
+    )
+
+    percentiles = (10, 25, 50, 75, 90)
+    return {
+        "success_probability": float(np.mean(depletion_years > horizon_years)),
+        "depletion_percentiles": dict(zip(percentiles, np.percentile(depletion_years, percentiles, method="inverted_cdf").tolist())),
+        "capital_percentiles": dict(zip(percentiles, np.percentile(balances, percentiles, axis=1))),
+        "real_income_percentiles": dict(zip(percentiles, np.percentile(real_income, percentiles, axis=1))),
+        "depletion_years": depletion_years,
+    }
+
+def optimize_drawdown_rate(capital, inflation_rate, years_to_retirement, assumed_return, equity_weight=0.6,
+                           target_probability=0.9, rebalance=True, horizon_years=30, num_paths=10000,
+                           equity_volatility=0.18, bond_volatility=0.07, inflation_volatility=0.015,
+                           min_rate=0.025, max_rate=0.175, step=0.0025, seed=None):
+    """Living-annuity drawdown rate that maximizes sustained real income at a target success probability."""
+    final_withdrawal_threshold = 125000
+    rng = np.random.default_rng(seed)
+    shape = (horizon_years, num_paths)
+    equity = np.maximum(rng.normal(assumed_return + 0.02, equity_volatility, shape), -0.99)
+    bonds = np.maximum(rng.normal(assumed_return - 0.02, bond_volatility, shape), -0.99)
+    inflation = rng.normal(inflation_rate, inflation_volatility, shape)
+    if rebalance:
+        growth = np.cumprod(1 + equity_weight * equity + (1 - equity_weight) * bonds, axis=0)
+    else:
+        growth = equity_weight * np.cumprod(1 + equity, axis=0) + (1 - equity_weight) * np.cumprod(1 + bonds, axis=0)
+    # Opening growth for each year's withdrawal: 1 in year one, then the growth to the previous year end
+    opening_growth = np.vstack([np.ones((1, num_paths)), growth[:-1]])
+    price_index = (1 + inflation_rate) ** years_to_retirement * np.cumprod(1 + inflation, axis=0)
+    real_opening = capital * opening_growth / price_index
+    log_floor = math.log(final_withdrawal_threshold / capital) if capital > 0 else math.inf
+    log_growth = np.log(growth)
+    years = np.arange(1, horizon_years + 1)[:, None]
+
+    rates = np.round(np.arange(min_rate, max_rate + step / 2, step), 6)
+    success = np.empty(len(rates))
+    sustained_income = np.empty(len(rates))
+    for index, rate in enumerate(rates):
+        survives = np.all(years * math.log(1 - rate) + log_growth > log_floor, axis=0)
+        success[index] = survives.mean()
+        # Income in year t is rate * C0 * (1 - rate)^(t - 1) * G(t - 1), deflated to today's money
+        lowest_income = (rate / 12 * (1 - rate) ** (years - 1) * real_opening).min(axis=0)
+        sustained_income[index] = np.median(np.where(survives, lowest_income, 0))
+    feasible = success >= target_probability
+    best = int(np.argmax(np.where(feasible, sustained_income, -np.inf))) if feasible.any() else 0
+    return {
+        "rates": rates,
+        "success_probability": success,
+        "sustained_real_income": sustained_income,
+        "optimal_rate": float(rates[best]),
+        "optimal_income": float(sustained_income[best]),
+        "optimal_success": float(success[best]),
+        "feasible": bool(feasible.any()),
+    }
+
+@functools.lru_cache(maxsize=1)
+def load_historical_returns():
+    """Annual equity, bond and CPI series bundled in data/historical_returns.csv, as float arrays."""
+    history = pd.read_csv(HISTORICAL_RETURNS_PATH, comment="#")
+    series = (
+        history["year"].to_numpy(),
+        history["jse_all_share"].to_numpy(dtype=np.float64),
+        history["all_bond"].to_numpy(dtype=np.float64),
+        history["cpi"].to_numpy(dtype=np.float64),
+    )
+    for values in series:
+        values.flags.writeable = False
+    return series
+
+def historical_paths(horizon_years, equity_weight):
+    """Year-major portfolio return and inflation matrices, one column per historical start year.
+
+    Each path stops at the end of the data rather than wrapping into sequences that never happened:
+    rows past a start year's last historical year are NaN, and path_years counts the real ones.
+    Start years with fewer than MIN_BACKTEST_YEARS of history (or the horizon, if shorter) are left out.
+    """
+    years, equity, bonds, cpi = load_historical_returns()
+    index = np.arange(horizon_years)[:, None] + np.arange(len(years))[None, :]
+    observed = index < len(years)
+    path_years = observed.sum(axis=0)
+    keep = path_years >= min(horizon_years, MIN_BACKTEST_YEARS)
+    index, observed = np.minimum(index, len(years) - 1)[:, keep], observed[:, keep]
+    returns = np.where(observed, equity_weight * equity[index] + (1 - equity_weight) * bonds[index], np.nan)
+    return years[keep], returns, np.where(observed, cpi[index], np.nan), path_years[keep]
+
+@functools.lru_cache(maxsize=256)
+def backtest_drawdown(capital, annual_income, inflation_rate, years_to_retirement, equity_weight, horizon_years,
+                      preserve_capital=False, drawdown_rate=0.05):
+    """Replay every historical start year through the drawdown rules in one vectorized run.
+
+    Depletion mode withdraws annual_income (escalated with historical CPI) under the 17.5% cap and
+    R125,000 rule; preserve-capital mode withdraws drawdown_rate of capital each year. Income and
+    final capital are in today's money. Paths that reach the end of the data stop there (path_years),
+    so their final capital is measured in the last historical year and surviving means lasting to it.
+    Results are cached by the input tuple, so the returned arrays are read-only.
+    """
+    start_years, returns, inflation, path_years = historical_paths(horizon_years, equity_weight)
+    if preserve_capital:
+        growth = (1 - drawdown_rate) * (1 + returns)
+        balances = np.empty((horizon_years + 1, len(start_years)))
+        balances[0] = capital
+        balances[1:] = capital * np.cumprod(growth, axis=0)
+        price_index = (1 + inflation_rate) ** years_to_retirement * np.cumprod(1 + inflation, axis=0)
+        real_income = drawdown_rate * balances[:-1] / 12 / price_index
+        depletion_years = np.full(len(start_years), np.inf)
+    else:
+        balances, real_income, depletion_years = run_drawdown_paths(
+            capital, annual_income, returns, inflation, years_to_retirement, inflation_rate
+        )
+        price_index = (1 + inflation_rate) ** years_to_retirement * np.cumprod(1 + inflation, axis=0)
+    paths = np.arange(len(start_years))
+    real_final_capital = balances[path_years, paths] / price_index[path_years - 1, paths]
+    observed = np.arange(horizon_years)[:, None] < path_years
+    worst = int(np.lexsort((real_final_capital, depletion_years))[0])
+    results = {
+        "start_years": start_years,
+        "path_years": path_years,
+        "depletion_years": depletion_years,
+        "real_final_capital": real_final_capital,
+        "min_real_income": np.where(observed, real_income, np.inf).min(axis=0),
+        "worst_real_income": real_income[:path_years[worst], worst].copy(),
+    }
+    for values in results.values():
+        values.flags.writeable = False
+    return {
+        **results,
+        "worst_start_year": int(start_years[worst]),
+        "worst_depletion_years": float(depletion_years[worst]),
+        "success_rate": float(np.mean(np.isinf(depletion_years))),
+    }
+
+@functools.lru_cache(maxsize=4096)
+def provision_projection(current_value, annual_return, monthly_contribution, contribution_increase, years_to_retirement):
+    """Future value plus month-end balance and contribution series for one provision.
+
+    Memoized process-wide on the provision's own inputs and years to retirement, so unchanged
+    provisions are never re-valued across reruns or advisor sessions. The series are read-only.
+    """
+    future_value = float(future_value_array(current_value, annual_return, years_to_retirement, monthly_contribution, contribution_increase))
+    # B(t) = g^t * (B0 + sum of c(s) * g^-s)
+    month_index = np.arange(1, 12 * years_to_retirement + 1)
+    contributions = monthly_contribution * (1 + contribution_increase) ** ((month_index - 1) // 12)
+    growth_powers = (1 + annual_return) ** (month_index / 12)
+    balances = growth_powers * (current_value + np.cumsum(contributions / growth_powers))
+    balances.setflags(write=False)
+    contributions.setflags(write=False)
+    return future_value, balances, contributions
+
+def aggregate_provisions(provisions, years_to_retirement, state):
+    """Provision future values and weighted return, re-valuing only provisions whose inputs changed.
+
+    state keeps one entry per form slot. Totals are summed from the slots on every call rather than
+    kept as running sums, so removing or zeroing provisions leaves no floating-point residue. Returns
+    (future values per provision, total future value, weighted average return).
+    """
+    slots = state.setdefault("slots", {})
+    for index in [index for index in slots if index >= len(provisions)]:
+        del slots[index]
+    for index, provision in enumerate(provisions):
+        key = (
+            provision["current_value"], provision["annual_return"], provision["monthly_contribution"],
+            provision["contribution_increase"], years_to_retirement
+        )
+        if index in slots and slots[index]["key"] == key:
+            continue
+        weight = provision["current_value"] + (provision["monthly_contribution"] * 12 * years_to_retirement)
+        slots[index] = {
+            "key": key,
+            "future_value": provision_projection(*key)[0],
+            "weight": weight,
+            "weighted_return": provision["annual_return"] * weight,
+        }
+    future_values = [slots[index]["future_value"] for index in range(len(provisions))]
+    total_weight = sum(slot["weight"] for slot in slots.values())
+    weighted_return = sum(slot["weighted_return"] for slot in slots.values())
+    average_return = weighted_return / total_weight if total_weight > 0 else 0
+    return future_values, sum(future_values), average_return
+
+LEDGER_DTYPE = np.dtype([
+    ("month", np.float64),
+    ("age", np.float64),
+    ("balance", np.float64),
+    ("contribution", np.float64),
+    ("withdrawal", np.float64),
+    ("real_balance", np.float64),
+    ("real_withdrawal", np.float64),
+])
+LEDGER_HEADERS = {
+    "month": "Month",
+    "age": "Age",
+    "balance": "Balance (R)",
+    "contribution": "Contribution (R)",
+    "withdrawal": "Withdrawal (R)",
+    "real_balance": "Balance in Today's Value (R)",
+    "real_withdrawal": "Withdrawal in Today's Value (R)",
+}
+
+def build_retirement_ledger(current_value, annual_return, monthly_contribution, contribution_increase, years_to_retirement,
+                            current_age, annual_income, inflation_rate, assumed_return, horizon_years):
+    """Month-by-month cashflow ledger from today through retirement, as one preallocated structured array.
+
+    Row 0 is today; each later row is the end of a month. Before retirement every provision grows at its
+    monthly equivalent rate with contributions added at month end and escalated yearly, so anniversary
+    balances equal future_value_array. After retirement the pooled capital follows the same withdrawal
+    rules as calculate_years_until_depletion: each year's withdrawal is taken in its first month.
+    """
+    current_value = np.atleast_1d(np.asarray(current_value, dtype=np.float64))
+    annual_return = np.atleast_1d(np.asarray(annual_return, dtype=np.float64))
+    monthly_contribution = np.atleast_1d(np.asarray(monthly_contribution, dtype=np.float64))
+    contribution_increase = np.atleast_1d(np.asarray(contribution_increase, dtype=np.float64))
+    accumulation_months = 12 * years_to_retirement
+    total_months = accumulation_months + 12 * horizon_years
+    ledger = np.zeros(total_months + 1, dtype=LEDGER_DTYPE)
+    months = np.arange(total_months + 1, dtype=np.float64)
+    ledger["month"] = months
+    ledger["age"] = current_age + months / 12
+
+    # Accumulation: sum of each provision's memoized month-end series
+    ledger["balance"][0] = current_value.sum()
+    for value, rate, contribution, increase in zip(
+        current_value.tolist(), annual_return.tolist(), monthly_contribution.tolist(), contribution_increase.tolist()
+    ):
+        _, balances, contributions = provision_projection(value, rate, contribution, increase, years_to_retirement)
+        ledger["balance"][1:accumulation_months + 1] += balances
+        ledger["contribution"][1:accumulation_months + 1] += contributions
+
+    # Decumulation: anniversary withdrawals from the closed-form drawdown, grown monthly in between
+    capital = ledger["balance"][accumulation_months]
+    _, _, capital_path, withdrawal_path, _, _ = calculate_years_until_depletion(
+        capital, annual_income, inflation_rate, years_to_retirement, assumed_return, max_years=horizon_years
+    )
+    withdrawals = np.zeros(horizon_years)
+    opening = np.zeros(horizon_years)
+    paid_years = min(len(withdrawal_path), horizon_years)
+    withdrawals[:paid_years] = withdrawal_path[:paid_years]
+    opening[:paid_years] = capital_path[:paid_years]
+    retirement_growth = (1 + assumed_return) ** (np.arange(1, 13) / 12)
+    ledger["balance"][accumulation_months + 1:] = ((opening - withdrawals)[:, None] * retirement_growth).ravel()
+    ledger["withdrawal"][accumulation_months + 1::12] = withdrawals
+
+    deflator = (1 + inflation_rate) ** (months / 12)
+    ledger["real_balance"] = ledger["balance"] / deflator
+    # Each year's withdrawal is in end-of-year money, as in calculate_years_until_depletion
+    ledger["real_withdrawal"] = ledger["withdrawal"] / (1 + inflation_rate) ** np.ceil(months / 12)
+    return ledger
+
+def write_ledger_sheet(writer, ledger, sheet_name):
+    """Write the ledger columns straight into an xlsxwriter-backed ExcelWriter sheet."""
+    worksheet = writer.book.add_worksheet(sheet_name)
+    writer.sheets[sheet_name] = worksheet
+    for column, field in enumerate(ledger.dtype.names):
+        worksheet.write(0, column, LEDGER_HEADERS[field])
+        worksheet.write_column(1, column, ledger[field].tolist())
+
+def provisions_value(current_value, annual_return, years, monthly_contribution=0, contribution_increase=0):
+    """Total future value of each client's provisions.
+
+    Provision inputs may be 2-D (clients x provisions, zero-padded); years is then one value per
+    client and the result is summed across each client's provisions.
+    """
+    current_value = np.asarray(current_value, dtype=np.float64)
+    if current_value.ndim < 2:
+        return future_value_array(current_value, annual_return, years, monthly_contribution, contribution_increase)
+    years = np.asarray(years, dtype=np.float64)[..., None]
+    return future_value_array(current_value, annual_return, years, monthly_contribution, contribution_increase).sum(axis=-1)
+
+def goal_seek(func, low, high, max_evaluations=60, tolerance=1e-7):
+    """Vectorized bisection for an increasing func: find x in [low, high] with func(x) = 0 per element.
+
+    Elements whose bracket holds no sign change return NaN. Stops after max_evaluations calls
+    or once every bracket is narrower than tolerance.
+    """
+    low, high = np.broadcast_arrays(np.asarray(low, dtype=np.float64), np.asarray(high, dtype=np.float64))
+    low, high = low.copy(), high.copy()
+    f_low, f_high = func(low), func(high)
+    solvable = (f_low <= 0) & (f_high >= 0)
+    for _ in range(max_evaluations - 2):
+        if np.all(high - low < tolerance):
+            break
+        mid = (low + high) / 2
+        above = func(mid) >= 0
+        high = np.where(above, mid, high)
+        low = np.where(above, low, mid)
+    return np.where(solvable, high, np.nan)
+
+def required_monthly_contribution(shortfall, years_to_retirement, annual_return, contribution_increase=0):
+    """Extra monthly contribution (escalating yearly, same monthly timing as the provisions) that closes the shortfall.
+
+    Future value is linear in the contribution, so the answer is exact without iteration.
+    """
+    value_per_rand = future_value_array(0, annual_return, years_to_retirement, 1, contribution_increase)
+    shortfall = np.asarray(shortfall, dtype=np.float64)
+    safe_value = np.where(value_per_rand > 0, value_per_rand, 1.0)
+    return np.where(shortfall > 0, np.where(value_per_rand > 0, shortfall / safe_value, np.inf), 0.0)
+
+def required_contribution_increase(capital_required, current_value, annual_return, years_to_retirement,
+                                   monthly_contribution, max_increase=0.5, max_evaluations=60):
+    """Annual contribution escalation, applied to every provision, that grows provisions to capital_required.
+
+    Returns 0 where provisions already cover the target and NaN where even max_increase falls short.
+    """
+    capital_required = np.asarray(capital_required, dtype=np.float64)
+
+    def gap(increase):
+        increase = increase[..., None] if np.ndim(current_value) == 2 else increase
+        return provisions_value(current_value, annual_return, years_to_retirement, monthly_contribution, increase) - capital_required
+
+    low = np.zeros(np.shape(capital_required))
+    increase = goal_seek(gap, low, low + max_increase, max_evaluations, tolerance=1e-10)
+    return np.where(gap(low) >= 0, 0.0, increase)
+
+def required_retirement_age(current_age, monthly_income, inflation_rate, annual_increase, preservation_years, assumed_return,
+                            current_value, annual_return, monthly_contribution=0, contribution_increase=0, max_age=80):
+    """Earliest whole retirement age at which provisions meet the preserve-capital target.
+
+    Scans every age up to max_age in one pass (ages x clients), since the funding gap need not
+    be monotonic in age. Returns NaN where the target is missed at every age.
+    """
+    current_age = np.asarray(current_age, dtype=np.float64)
+    horizon = np.maximum(max_age - current_age, 1)
+    years = np.arange(1, int(np.max(horizon, initial=1)) + 1, dtype=np.float64)[:, None] + np.zeros_like(current_age)
+    target = retirement_plan_array(monthly_income, inflation_rate, annual_increase, years, preservation_years, assumed_return)[1]
+    met = (provisions_value(current_value, annual_return, years, monthly_contribution, contribution_increase) >= target) & (years <= horizon)
+    return np.where(met.any(axis=0), current_age + met.argmax(axis=0) + 1, np.nan)
 
 def calculate_retirement_plan(monthly_income, inflation_rate, annual_increase, years_to_retirement, preserve_capital, preservation_years, assumed_return):
     """Calculate the retirement plan details."""
@@ -102,6 +543,127 @@ def calculate_retirement_plan(monthly_income, inflation_rate, annual_increase, y
         )[0]
         return future_annual_income, future_monthly_income, capital_required, years_until_depletion, withdrawal_at_retirement
 
+def retirement_plan_array(monthly_income, inflation_rate, annual_increase, years_to_retirement, preservation_years, assumed_return):
+    """Vectorized future income and preserve-capital target for broadcast arrays of assumptions.
+
+    Mirrors calculate_retirement_plan so a whole inflation x return grid evaluates in one pass.
+    Returns (future_annual_income, capital_required); capital_required is inf where the return is not positive.
+    """
+    inflation_rate = np.asarray(inflation_rate, dtype=np.float64)
+    assumed_return = np.asarray(assumed_return, dtype=np.float64)
+    growth = (1 + inflation_rate) * (1 + annual_increase)
+    future_annual_income = monthly_income * 12 * growth ** years_to_retirement
+    income_after_preservation = future_annual_income * growth ** preservation_years
+    remaining_years = 20  # Default remaining life expectancy after preservation
+    positive = assumed_return > 0
+    safe_return = np.where(positive, assumed_return, 1.0)
+    annuity_factor = (1 - (1 + safe_return) ** (-remaining_years)) / safe_return
+    capital_required = np.maximum(
+        future_annual_income / safe_return,
+        income_after_preservation * annuity_factor / (1 + safe_return) ** preservation_years,
+    )
+    return future_annual_income, np.where(positive, capital_required, np.inf)
+
+def sensitivity_grid(plan, inflation_values, return_values):
+    """Evaluate the plan over every inflation x return pair in one vectorized pass.
+
+    Returns shortfall (preserve capital) or years until depletion (capped at age 100) with
+    inflation along rows and return along columns.
+    """
+    inflation_grid, return_grid = np.meshgrid(inflation_values, return_values, indexing="ij")
+    future_annual_income, capital_required = retirement_plan_array(
+        plan["desired_monthly_income"], inflation_grid, plan["annual_increase"], plan["years_to_retirement"],
+        plan["preservation_years"], return_grid
+    )
+    if plan["preserve_capital"]:
+        return capital_required - plan["total_provision_value"]
+    horizon_years = max(100 - plan["retirement_age"], 1)
+    depletion_years = simulate_depletion_paths(
+        plan["total_provision_value"], future_annual_income.ravel(), inflation_grid.ravel(), plan["years_to_retirement"],
+        return_grid.ravel(), return_volatility=0, inflation_volatility=0, num_paths=inflation_grid.size,
+        horizon_years=horizon_years, escalate_income=False
+    )["depletion_years"]
+    return np.minimum(depletion_years, horizon_years).reshape(inflation_grid.shape)
+
+def show_sensitivity_panel(plan):
+    """Inflation x return heatmap for the last calculated plan, redrawn as the sliders move."""
+    st.write("**Inflation x Return Sensitivity**")
+    r1, r2, r3 = st.columns(3)
+    with r1:
+        inflation_range = st.slider("Inflation Range (%)", 0.0, 15.0, (2.0, 10.0), 0.5, key="sens_inflation")
+    with r2:
+        return_range = st.slider("Return Range (%)", 0.0, 20.0, (3.0, 12.0), 0.5, key="sens_return")
+    with r3:
+        grid_size = st.slider("Grid Resolution", 10, 80, 40, 5, key="sens_grid")
+    inflation_values = np.linspace(inflation_range[0], inflation_range[1], grid_size) / 100
+    return_values = np.linspace(return_range[0], return_range[1], grid_size) / 100
+    z = sensitivity_grid(plan, inflation_values, return_values)
+    if plan["preserve_capital"]:
+        title, colorbar_title, colorscale = "Capital Shortfall (R)", "Shortfall (R)", "RdYlGn_r"
+        hovertemplate = "Inflation: %{y:.1f}%<br>Return: %{x:.1f}%<br>Shortfall: R%{z:,.0f}<extra></extra>"
+        z = np.where(np.isfinite(z), z, np.nan)
+    else:
+        title, colorbar_title, colorscale = "Years Until Capital Depletion", "Years", "RdYlGn"
+        hovertemplate = "Inflation: %{y:.1f}%<br>Return: %{x:.1f}%<br>Years: %{z:.0f}<extra></extra>"
+    fig_heat = go.Figure(go.Heatmap(
+        x=return_values * 100, y=inflation_values * 100, z=z, colorscale=colorscale,
+        colorbar=dict(title=colorbar_title), hovertemplate=hovertemplate
+    ))
+    fig_heat.add_trace(go.Scatter(
+        x=[plan["assumed_return"] * 100], y=[plan["inflation_rate"] * 100], mode="markers",
+        marker=dict(color="#e6edf7", size=12, symbol="x"), name="Current plan"
+    ))
+    fig_heat.update_layout(
+        title=title,
+        xaxis_title="Assumed Return After Retirement (%)",
+        yaxis_title="Inflation Rate (%)",
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="#0f1b30",
+        font={'color': "#e6edf7"},
+        yaxis={'tickfont': {'color': "#e6edf7"}},
+        xaxis={'tickfont': {'color': "#e6edf7"}}
+    )
+    st.plotly_chart(fig_heat)
+
+def show_backtest_panel(backtest, retirement_age, preserve_capital):
+    """Historical start-year results: worst sequence and outcome for every rolling start year."""
+    st.write("**Historical Sequence-of-Returns Backtest**")
+    start_years = backtest["start_years"]
+    end_ages = retirement_age + backtest["path_years"]
+    b1, b2 = st.columns(2)
+    b1.metric("Worst historical start year", f"{backtest['worst_start_year']}")
+    if preserve_capital:
+        b2.metric("Lowest real capital at end of path (today's value)", f"R {backtest['real_final_capital'].min():,.0f}")
+        y_values, y_title = backtest["real_final_capital"], "Real Capital at End of Path (R, today's value)"
+        hovertemplate = "Start year: %{x}<br>Real capital at age %{customdata}: R%{y:,.0f}<extra></extra>"
+    else:
+        b2.metric("Start years lasting to end of path", f"{backtest['success_rate'] * 100:.0f}%")
+        y_values = np.where(np.isinf(backtest["depletion_years"]), end_ages, retirement_age + backtest["depletion_years"])
+        y_title = "Depletion Age (or age at end of path)"
+        hovertemplate = "Start year: %{x}<br>Depletion age: %{y:.0f} (path ends at %{customdata})<extra></extra>"
+    colors = ["#d62728" if year == backtest["worst_start_year"] else "#1f77b4" for year in start_years]
+    fig_backtest = go.Figure(go.Bar(
+        x=start_years, y=y_values, customdata=end_ages, marker_color=colors, hovertemplate=hovertemplate
+    ))
+    fig_backtest.update_layout(
+        title="Outcome by Historical Start Year",
+        xaxis_title="Start Year",
+        yaxis_title=y_title,
+        showlegend=False,
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="#0f1b30",
+        font={'color': "#e6edf7"},
+        yaxis={'tickfont': {'color': "#e6edf7"}},
+        xaxis={'tickfont': {'color': "#e6edf7"}}
+    )
+    st.plotly_chart(fig_backtest)
+    years = load_historical_returns()[0]
+    st.caption(
+        f"Rolling start years replay bundled JSE All Share, All Bond and CPI history ({years[0]}-{years[-1]}). "
+        f"Each path stops at age 100 or at the end of the data, whichever comes first, so later start years "
+        f"cover fewer years; start years with under {MIN_BACKTEST_YEARS} years of history are left out."
+    )
+
 def show():
     snapshot = st.session_state.get("client_snapshot", {})
     client_name = snapshot.get("client_name", "")
@@ -147,6 +709,23 @@ def show():
             preservation_years = st.selectbox("Preservation Period (Years)", [10, 15, 20, 25])
         st.caption("Inflation-adjusted income model with max 17.5% drawdown if depletion is allowed.")
 
+    with st.expander("Monte Carlo, backtest and drawdown settings", expanded=False):
+        mc1, mc2, mc3, mc4 = st.columns(4)
+        with mc1:
+            return_volatility = st.number_input("Return Volatility (%)", min_value=0.0, max_value=40.0, value=12.0, step=0.5) / 100
+        with mc2:
+            inflation_volatility = st.number_input("Inflation Volatility (%)", min_value=0.0, max_value=10.0, value=1.5, step=0.25) / 100
+        with mc3:
+            num_paths = st.selectbox("Simulated Paths", [10000, 25000, 50000, 100000])
+        with mc4:
+            equity_weight = st.number_input("Equity Allocation (%)", min_value=0.0, max_value=100.0, value=60.0, step=5.0) / 100
+        dd1, dd2 = st.columns(2)
+        with dd1:
+            target_probability = st.number_input("Target Probability of Never Depleting (%)", min_value=50.0, max_value=99.0, value=90.0, step=1.0) / 100
+        with dd2:
+            rebalance_annually = st.checkbox("Rebalance Annually", value=True)
+        st.caption("Monte Carlo paths run to age 100 when capital depletion is allowed. The backtest and drawdown optimizer blend equities with bonds at the chosen allocation.")
+
     provision_types = [
         "Retirement Annuity", "Pension Fund", "Provident Fund", "Preservation Fund",
         "Business", "Endowment", "Savings Fund", "Shares", "Linked Investment",
@@ -186,19 +765,11 @@ def show():
                 future_annual_income, future_monthly_income, capital_required, years_until_depletion, _ = calculate_retirement_plan(
                     desired_monthly_income, inflation_rate, desired_annual_increase, years_to_retirement, preserve_capital, preservation_years, assumed_return
                 )
-                total_provision_value = 0
+                future_values, total_provision_value, average_return = aggregate_provisions(
+                    provisions, years_to_retirement, st.session_state.setdefault("retirement_provision_cache", {})
+                )
                 provisions_data = []
-                average_return = 0
-                total_weight = 0
-                for provision in provisions:
-                    fv = calculate_future_value(
-                        provision["current_value"],
-                        provision["annual_return"],
-                        years_to_retirement,
-                        provision["monthly_contribution"],
-                        provision["contribution_increase"]
-                    )
-                    total_provision_value += fv
+                for provision, fv in zip(provisions, future_values):
                     provisions_data.append({
                         "Type": provision["type"],
                         "Current Value (R)": provision["current_value"],
@@ -207,11 +778,6 @@ def show():
                         "Annual Contribution Increase (%)": provision["contribution_increase"] * 100,
                         "Future Value at Retirement (R)": fv
                     })
-                    weight = provision["current_value"] + (provision["monthly_contribution"] * 12 * years_to_retirement)
-                    average_return += provision["annual_return"] * weight
-                    total_weight += weight
-                if total_weight > 0:
-                    average_return /= total_weight
                 summary_data = {
                     "Client": [client_name],
                     "Current Age": [current_age],
@@ -262,6 +828,17 @@ def show():
                 m2.metric("Provisions @ retirement", f"R {total_provision_value:,.0f}")
 
                 summary_data["Total Future Value of Provisions (R)"] = [total_provision_value]
+                st.session_state["retirement_sensitivity"] = {
+                    "desired_monthly_income": desired_monthly_income,
+                    "annual_increase": desired_annual_increase,
+                    "inflation_rate": inflation_rate,
+                    "assumed_return": assumed_return,
+                    "years_to_retirement": years_to_retirement,
+                    "retirement_age": retirement_age,
+                    "preserve_capital": preserve_capital,
+                    "preservation_years": preservation_years,
+                    "total_provision_value": total_provision_value,
+                }
                 if preserve_capital:
                     shortfall = capital_required - total_provision_value
                     m3.metric("Capital target", f"R {capital_required:,.0f}")
@@ -322,29 +899,45 @@ def show():
                     summary_data["Initial Withdrawal at Retirement (Monthly, Future Value) (R)"] = [future_monthly_actual]
                     summary_data["Initial Withdrawal at Retirement (Monthly, Today's Value) (R)"] = [current_monthly_actual]
 
-                    # Progress bar for drawdown rate
-                    color = "#2ca02c" if drawdown_rate <= 5 else "#ff7f0e" if drawdown_rate <= 10 else "#d62728"
-                    fig_progress = go.Figure(go.Bar(
-                        x=[drawdown_rate],
-                        y=["Drawdown Rate"],
-                        orientation='h',
-                        marker_color=color,
-                        text=[f"{drawdown_rate:.2f}%"],
-                        textposition='auto',
+                    # Drawdown-rate curve across the legislated band, with the optimal rate for the target probability
+                    optimizer = optimize_drawdown_rate(
+                        total_provision_value, inflation_rate, years_to_retirement, assumed_return, equity_weight,
+                        target_probability, rebalance_annually, max(100 - retirement_age, 1)
+                    )
+                    optimal_rate = optimizer["optimal_rate"] * 100
+                    o1, o2 = st.columns(2)
+                    o1.metric("Optimal drawdown rate", f"{optimal_rate:.2f}%" if optimizer["feasible"] else "Target not reachable",
+                              delta=f"{optimal_rate - drawdown_rate:+.2f}% vs current" if optimizer["feasible"] else None)
+                    o2.metric("Sustained real income (monthly, today's value)", f"R {optimizer['optimal_income']:,.0f}")
+                    summary_data["Optimal Drawdown Rate (%)"] = [optimal_rate]
+                    summary_data["Optimal Sustained Real Income (Monthly) (R)"] = [optimizer["optimal_income"]]
+                    rate_axis = optimizer["rates"] * 100
+                    fig_progress = go.Figure()
+                    fig_progress.add_trace(go.Scatter(
+                        x=rate_axis, y=optimizer["sustained_real_income"], mode="lines", name="Sustained real income (R/month)",
+                        line=dict(color="#1f77b4", width=3),
+                        hovertemplate="Rate: %{x:.2f}%<br>Sustained income: R%{y:,.0f}<extra></extra>"
+                    ))
+                    fig_progress.add_trace(go.Scatter(
+                        x=rate_axis, y=optimizer["success_probability"] * 100, mode="lines", name="Probability of never depleting (%)",
+                        line=dict(color="#2ca02c", width=2, dash="dot"), yaxis="y2",
+                        hovertemplate="Rate: %{x:.2f}%<br>Success: %{y:.1f}%<extra></extra>"
                     ))
-                    fig_progress.add_vline(x=17.5, line_dash="dash", line_color="red", annotation_text="Max Legislative Rate (17.5%)", annotation_position="top")
-                    fig_progress.add_vline(x=2.5, line_dash="dash", line_color="green", annotation_text="Min Legislative Rate (2.5%)", annotation_position="bottom")
+                    fig_progress.add_vline(x=drawdown_rate, line_dash="dash", line_color="#ff7f0e", annotation_text=f"Current ({drawdown_rate:.2f}%)", annotation_position="top")
+                    if optimizer["feasible"]:
+                        fig_progress.add_vline(x=optimal_rate, line_dash="dash", line_color="#2ca02c", annotation_text=f"Optimal ({optimal_rate:.2f}%)", annotation_position="bottom")
                     fig_progress.update_layout(
-                        title="Initial Drawdown Rate (%)",
+                        title="Drawdown Rate Within the 2.5%-17.5% Legislated Band",
                         xaxis_title="Drawdown Rate (%)",
-                        yaxis_title="",
-                        xaxis=dict(range=[0, 20], tickfont=dict(color="#e6edf7")),
+                        yaxis_title="Sustained Real Income (R/month)",
+                        xaxis=dict(range=[2.5, 17.5], tickfont=dict(color="#e6edf7")),
                         yaxis=dict(tickfont=dict(color="#e6edf7")),
-                        showlegend=False,
+                        yaxis2=dict(title="Probability (%)", overlaying="y", side="right", range=[0, 100], tickfont=dict(color="#e6edf7")),
+                        showlegend=True,
                         paper_bgcolor="rgba(0,0,0,0)",
                         plot_bgcolor="#0f1b30",
                         font={'color': "#e6edf7"},
-                        height=200
+                        height=380
                     )
                     st.plotly_chart(fig_progress)
 
@@ -375,12 +968,25 @@ def show():
                     )
                     st.plotly_chart(fig_bar)
 
+                    backtest = backtest_drawdown(
+                        float(total_provision_value), 0.0, inflation_rate, years_to_retirement, equity_weight,
+                        max(100 - retirement_age, 1), True, drawdown_rate / 100
+                    )
+                    show_backtest_panel(backtest, retirement_age, preserve_capital)
+                    summary_data["Worst Historical Start Year"] = [backtest["worst_start_year"]]
+
                     summary_data["Years Until Capital Depletion"] = ["N/A"]
                 else:
-                    years_until_depletion, first_withdrawal, capital_over_time, withdrawals_over_time, monthly_income_over_time, monthly_income_today_value = calculate_years_until_depletion(
-                        total_provision_value, future_annual_income, inflation_rate, years_to_retirement, assumed_return
-                    )
-                    m3.metric("Projected duration", f"{years_until_depletion} yrs")
+                    years_until_depletion, first_withdrawal = calculate_years_until_depletion(
+                        total_provision_value, future_annual_income, inflation_rate, years_to_retirement, assumed_return,
+                        max_years=max(100 - retirement_age, 1)
+                    )[:2]
+                    first_withdrawal = first_withdrawal or 0
+                    if math.isinf(years_until_depletion):
+                        years_until_depletion = "Beyond age 100"
+                        m3.metric("Projected duration", "Lasts past 100")
+                    else:
+                        m3.metric("Projected duration", f"{years_until_depletion} yrs")
                     st.write(f"**Capital at Retirement (Based on Provisions)**: R {total_provision_value:,.2f}")
                     st.write(f"**Years Until Capital Depletion**: {years_until_depletion}")
                     st.write(f"**Initial Withdrawal at Retirement (Annual)**: R {first_withdrawal:,.2f}")
@@ -392,29 +998,33 @@ def show():
                     summary_data["Preserve Capital"] = ["No"]
                     summary_data["Preservation Period (Years)"] = [0]
                     st.write("**Capital Depletion Over Time**")
-                    chart_data = pd.DataFrame({
-                        "Age": list(range(retirement_age, retirement_age + len(capital_over_time))),
-                        "Capital (R)": capital_over_time,
-                        "Annual Withdrawal (R)": withdrawals_over_time,
-                        "Monthly Income (R)": monthly_income_over_time,
-                        "Monthly Income in Today's Value (R)": monthly_income_today_value
-                    })
-                    # First Graph: Capital and Annual Withdrawal
+                    horizon_years = max(100 - retirement_age, 1)
+                    ledger = build_retirement_ledger(
+                        [provision["current_value"] for provision in provisions],
+                        [provision["annual_return"] for provision in provisions],
+                        [provision["monthly_contribution"] for provision in provisions],
+                        [provision["contribution_increase"] for provision in provisions],
+                        years_to_retirement, current_age, future_annual_income, inflation_rate, assumed_return, horizon_years
+                    )
+                    anniversaries = ledger[12 * years_to_retirement + 1::12]
+                    anniversary_ages = np.round(anniversaries["age"] - 1 / 12).tolist()
+                    # First Graph: Capital (month by month, before and after retirement) and Annual Withdrawal
                     fig1 = go.Figure()
                     fig1.add_trace(go.Scatter(
-                        x=chart_data["Age"],
-                        y=chart_data["Capital (R)"],
+                        x=ledger["age"],
+                        y=ledger["balance"],
                         mode="lines",
                         name="Capital (R)",
-                        hovertemplate="Age: %{x}<br>Capital: R%{y:.2f}<extra></extra>"
+                        hovertemplate="Age: %{x:.1f}<br>Capital: R%{y:,.2f}<extra></extra>"
                     ))
                     fig1.add_trace(go.Scatter(
-                        x=chart_data["Age"],
-                        y=chart_data["Annual Withdrawal (R)"],
+                        x=anniversary_ages,
+                        y=anniversaries["withdrawal"],
                         mode="lines",
                         name="Annual Withdrawal (R)",
-                        hovertemplate="Age: %{x}<br>Annual Withdrawal: R%{y:.2f}<extra></extra>"
+                        hovertemplate="Age: %{x}<br>Annual Withdrawal: R%{y:,.2f}<extra></extra>"
                     ))
+                    fig1.add_vline(x=retirement_age, line_dash="dash", line_color="#e6edf7", annotation_text="Retirement")
                     fig1.update_layout(
                         title="Capital and Annual Withdrawal Over Time",
                         xaxis_title="Age",
@@ -432,18 +1042,18 @@ def show():
                     # Second Graph: Monthly Income (Future Value) and Monthly Income in Today's Value
                     fig2 = go.Figure()
                     fig2.add_trace(go.Scatter(
-                        x=chart_data["Age"],
-                        y=chart_data["Monthly Income (R)"],
+                        x=anniversary_ages,
+                        y=anniversaries["withdrawal"] / 12,
                         mode="lines",
                         name="Monthly Income (Future Value) (R)",
-                        hovertemplate="Age: %{x}<br>Monthly Income (Future): R%{y:.2f}<extra></extra>"
+                        hovertemplate="Age: %{x}<br>Monthly Income (Future): R%{y:,.2f}<extra></extra>"
                     ))
                     fig2.add_trace(go.Scatter(
-                        x=chart_data["Age"],
-                        y=chart_data["Monthly Income in Today's Value (R)"],
+                        x=anniversary_ages,
+                        y=anniversaries["real_withdrawal"] / 12,
                         mode="lines",
                         name="Monthly Income in Today's Value (R)",
-                        hovertemplate="Age: %{x}<br>Monthly Income (Today's Value): R%{y:.2f}<extra></extra>"
+                        hovertemplate="Age: %{x}<br>Monthly Income (Today's Value): R%{y:,.2f}<extra></extra>"
                     ))
                     fig2.update_layout(
                         title="Monthly Income Over Time",
@@ -459,32 +1069,114 @@ def show():
                     )
                     st.plotly_chart(fig2)
 
+                    # Monte Carlo fan chart of capital across simulated return/inflation paths
+                    simulation = simulate_depletion_paths(
+                        total_provision_value, future_annual_income, inflation_rate, years_to_retirement, assumed_return,
+                        return_volatility, inflation_volatility, num_paths, horizon_years, escalate_income=False
+                    )
+                    depletion_percentiles = simulation["depletion_percentiles"]
+
+                    def depletion_age_label(years):
+                        return "100+" if years > horizon_years else f"{retirement_age + int(years)}"
+
+                    s1, s2, s3 = st.columns(3)
+                    s1.metric("Probability capital lasts to 100", f"{simulation['success_probability'] * 100:.1f}%")
+                    s2.metric("Median depletion age", depletion_age_label(depletion_percentiles[50]))
+                    s3.metric("Pessimistic depletion age (P10)", depletion_age_label(depletion_percentiles[10]))
+                    summary_data["Monte Carlo Success Probability (%)"] = [simulation["success_probability"] * 100]
+                    summary_data["Monte Carlo Median Depletion Age"] = [depletion_age_label(depletion_percentiles[50])]
+
+                    fan_ages = list(range(retirement_age, retirement_age + horizon_years + 1))
+                    capital_percentiles = simulation["capital_percentiles"]
+                    fig_fan = go.Figure()
+                    fig_fan.add_trace(go.Scatter(x=fan_ages, y=capital_percentiles[90], mode="lines", line=dict(width=0), showlegend=False, hoverinfo="skip"))
+                    fig_fan.add_trace(go.Scatter(
+                        x=fan_ages, y=capital_percentiles[10], mode="lines", line=dict(width=0), fill="tonexty",
+                        fillcolor="rgba(31, 119, 180, 0.2)", name="P10-P90"
+                    ))
+                    fig_fan.add_trace(go.Scatter(x=fan_ages, y=capital_percentiles[75], mode="lines", line=dict(width=0), showlegend=False, hoverinfo="skip"))
+                    fig_fan.add_trace(go.Scatter(
+                        x=fan_ages, y=capital_percentiles[25], mode="lines", line=dict(width=0), fill="tonexty",
+                        fillcolor="rgba(31, 119, 180, 0.4)", name="P25-P75"
+                    ))
+                    fig_fan.add_trace(go.Scatter(
+                        x=fan_ages, y=capital_percentiles[50], mode="lines", line=dict(color="#1f77b4", width=3), name="Median",
+                        hovertemplate="Age: %{x}<br>Median capital: R%{y:,.0f}<extra></extra>"
+                    ))
+                    fig_fan.update_layout(
+                        title=f"Capital Across {num_paths:,} Simulated Paths",
+                        xaxis_title="Age",
+                        yaxis_title="Capital (R)",
+                        showlegend=True,
+                        paper_bgcolor="rgba(0,0,0,0)",
+                        plot_bgcolor="#0f1b30",
+                        font={'color': "#e6edf7"},
+                        yaxis={'tickfont': {'color': "#e6edf7"}},
+                        xaxis={'tickfont': {'color': "#e6edf7"}}
+                    )
+                    st.plotly_chart(fig_fan)
+
+                    backtest = backtest_drawdown(
+                        float(total_provision_value), float(future_annual_income), inflation_rate, years_to_retirement,
+                        equity_weight, horizon_years
+                    )
+                    show_backtest_panel(backtest, retirement_age, preserve_capital)
+                    summary_data["Worst Historical Start Year"] = [backtest["worst_start_year"]]
+
                 if preserve_capital and shortfall > 0:
-                    additional_savings = calculate_additional_savings_needed(shortfall, years_to_retirement, average_return)
+                    # Goal-seek on the real projection engine (monthly timing, escalating contributions)
+                    provision_arrays = {
+                        key: np.array([[provision[key] for provision in provisions]])
+                        for key in ("current_value", "annual_return", "monthly_contribution", "contribution_increase")
+                    }
+                    total_contributions = provision_arrays["monthly_contribution"].sum()
+                    contribution_escalation = (
+                        float((provision_arrays["contribution_increase"] * provision_arrays["monthly_contribution"]).sum() / total_contributions)
+                        if total_contributions > 0 else 0.0
+                    )
+                    additional_savings = float(required_monthly_contribution(shortfall, years_to_retirement, average_return, contribution_escalation))
+                    required_increase = float(required_contribution_increase(
+                        capital_required, provision_arrays["current_value"], provision_arrays["annual_return"], [years_to_retirement],
+                        provision_arrays["monthly_contribution"]
+                    )[0])
+                    required_age = float(required_retirement_age(
+                        [current_age], desired_monthly_income, inflation_rate, desired_annual_increase, preservation_years, assumed_return,
+                        provision_arrays["current_value"], provision_arrays["annual_return"],
+                        provision_arrays["monthly_contribution"], provision_arrays["contribution_increase"]
+                    )[0])
                     st.warning(f"**Capital Shortfall**: R {shortfall:,.2f}")
-                    st.write(f"**Additional Monthly Savings Needed**: R {additional_savings:,.2f}")
+                    st.write(f"**Additional Monthly Savings Needed** (escalating {contribution_escalation * 100:.1f}% a year): R {additional_savings:,.2f}")
+                    st.write(
+                        f"**Or: Contribution Increase Needed on Current Provisions**: "
+                        + (f"{required_increase * 100:.2f}% a year" if not math.isnan(required_increase) else "above 50% a year")
+                    )
+                    st.write(
+                        f"**Or: Retirement Age That Closes the Gap**: "
+                        + (f"{required_age:.0f}" if not math.isnan(required_age) else "beyond 80")
+                    )
                     summary_data["Capital Shortfall (R)"] = [shortfall]
                     summary_data["Additional Monthly Savings Needed (R)"] = [additional_savings]
+                    summary_data["Required Contribution Increase (%)"] = [required_increase * 100]
+                    summary_data["Required Retirement Age"] = [required_age]
                 elif preserve_capital and shortfall <= 0:
                     st.write(f"**Capital Excess**: R {-shortfall:,.2f}")
                     summary_data["Capital Excess (R)"] = [-shortfall]
                     summary_data["Capital Shortfall (R)"] = [0]
                     summary_data["Additional Monthly Savings Needed (R)"] = [0]
                 summary_df = pd.DataFrame(summary_data)
-                chart_df = pd.DataFrame(chart_data).reset_index() if not preserve_capital else pd.DataFrame()
                 buffer = io.BytesIO()
                 with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
                     summary_df.to_excel(writer, index=False, sheet_name="Retirement Plan Summary")
                     provisions_df.to_excel(writer, startrow=len(summary_df) + 2, index=False, sheet_name="Retirement Plan Summary")
                     if not preserve_capital:
-                        chart_df.to_excel(writer, index=False, sheet_name="Chart Data", startrow=0)
+                        write_ledger_sheet(writer, ledger, "Chart Data")
                     instructions = pd.DataFrame({
                         "Instructions": [
                             "This Excel file contains your Retirement Plan Summary and Provisions Data.",
-                            "If you did not opt to preserve capital, the 'Chart Data' sheet includes data for visualizing capital depletion over time.",
+                            "If you did not opt to preserve capital, the 'Chart Data' sheet holds the month-by-month ledger from today to age 100.",
                             "To recreate the line chart in Excel (if applicable):",
                             "1. Go to the 'Chart Data' sheet.",
-                            "2. Select the 'Age' and 'Capital (R)' columns (or other metrics).",
+                            "2. Select the 'Age' and 'Balance (R)' columns (or other metrics).",
                             "3. Click Insert > Line Chart in Excel to visualize the depletion."
                         ]
                     })
@@ -499,5 +1191,8 @@ def show():
             except Exception as e:
                 st.error(f"Error: {e}")
 
+    if "retirement_sensitivity" in st.session_state:
+        show_sensitivity_panel(st.session_state["retirement_sensitivity"])
+
 if __name__ == "__main__":
     show()
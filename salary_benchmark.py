@@ -0,0 +1,169 @@
+"""Reproducible benchmark for the salary tax engine.
+
+Usage:
+    python salary_benchmark.py results.json --baseline data/benchmarks/salary_tax_baseline.json
+    python salary_benchmark.py data/benchmarks/salary_tax_baseline.json --update-baseline
+
+Times calculate_salary_tax (scalar, up to 100k salaries) and calculate_salary_tax_array (1 to 10M
+salaries, in 1M chunks) on a fixed-seed synthetic payroll. Each timed pass runs the engine over the
+whole payroll. Reports throughput (from the fastest pass, as timeit does, so noisy neighbours do not
+read as regressions), p50/p99 time per pass and peak traced memory, and checks the array engine
+against the scalar function. Results are written as JSON. With --baseline, the run fails (exit code
+1) if parity breaks or throughput drops by more than --tolerance against the stored baseline.
+Baselines are machine specific; refresh them on the release build host with --update-baseline.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from salary_calculator import SALARY_TAX_FIELDS, calculate_salary_tax, calculate_salary_tax_array
+from tax_engine import evaluate_household
+
+SIZES = (1, 1_000, 100_000, 10_000_000)
+SCALAR_MAX_SIZE = 100_000
+CHUNK_SIZE = 1_000_000
+PARITY_SAMPLE = 10_000
+PARITY_TOLERANCE = 1e-6
+SEED = 20250301
+
+
+def synthetic_payroll(size, seed=SEED):
+    """Fixed-seed salaries, pension contributions, ages and medical dependants."""
+    rng = np.random.default_rng(seed)
+    gross_salary = np.round(rng.lognormal(np.log(420_000), 0.8, size), -2)
+    pension_contribution = np.round(gross_salary * rng.choice([0, 0.05, 0.075, 0.1, 0.15], size), -2)
+    age = rng.integers(18, 85, size)
+    num_dependants = rng.integers(0, 6, size)
+    return gross_salary, pension_contribution, age, num_dependants
+
+
+def run_array(payroll):
+    """One pass of the array engine over the payroll, chunked to bound memory."""
+    size = len(payroll[0])
+    for start in range(0, size, CHUNK_SIZE):
+        chunk = [values[start:start + CHUNK_SIZE] for values in payroll]
+        calculate_salary_tax_array(chunk[0], chunk[1], chunk[2], 0, chunk[3])
+
+
+def run_scalar(payroll):
+    """One pass of the scalar function, with its memo cache cleared so every call computes."""
+    evaluate_household.cache_clear()
+    for gross_salary, pension_contribution, age, num_dependants in zip(*(values.tolist() for values in payroll)):
+        calculate_salary_tax(gross_salary, pension_contribution, age, 0, num_dependants)
+
+
+def repeats_for(size, engine):
+    """Enough passes for stable percentiles without making the 10M run take minutes."""
+    if engine == "scalar":
+        return max(5, min(1_000, 10_000 // size))
+    return max(5, min(1_000, 2_000_000 // size))
+
+
+def time_engine(run, payroll, repeats):
+    """Seconds per pass over the whole payroll, after one warm-up pass."""
+    run(payroll)
+    pass_times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run(payroll)
+        pass_times.append(time.perf_counter() - start)
+    return np.array(pass_times)
+
+
+def peak_memory_mb(run, payroll):
+    """Peak memory traced by tracemalloc (NumPy buffers included) during one call."""
+    tracemalloc.start()
+    try:
+        run(payroll)
+        return tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+
+def parity_max_abs_diff(payroll):
+    """Largest difference between the array engine and the scalar function over a sample."""
+    sample = [values[:PARITY_SAMPLE] for values in payroll]
+    array_result = calculate_salary_tax_array(sample[0], sample[1], sample[2], 0, sample[3])
+    scalar_result = np.array([
+        calculate_salary_tax(gross_salary, pension_contribution, age, 0, num_dependants)
+        for gross_salary, pension_contribution, age, num_dependants in zip(*(values.tolist() for values in sample))
+    ])
+    return float(max(np.abs(array_result[field] - scalar_result[:, i]).max() for i, field in enumerate(SALARY_TAX_FIELDS)))
+
+
+def run_benchmarks(sizes=SIZES):
+    """Benchmark both engines at each size and return the JSON-ready report."""
+    results = []
+    for size in sizes:
+        payroll = synthetic_payroll(size)
+        parity = parity_max_abs_diff(payroll)
+        engines = [("array", run_array)] + ([("scalar", run_scalar)] if size <= SCALAR_MAX_SIZE else [])
+        for engine, run in engines:
+            pass_times = time_engine(run, payroll, repeats_for(size, engine))
+            results.append({
+                "engine": engine,
+                "size": size,
+                "repeats": len(pass_times),
+                "throughput_per_s": size / float(pass_times.min()),
+                "p50_pass_ms": float(np.percentile(pass_times, 50) * 1e3),
+                "p99_pass_ms": float(np.percentile(pass_times, 99) * 1e3),
+                "peak_mb": peak_memory_mb(run, payroll),
+                "parity_max_abs_diff": parity,
+            })
+            print(f"{engine:>6} {size:>10,}: {results[-1]['throughput_per_s']:>14,.0f}/s  pass p50 {results[-1]['p50_pass_ms']:.3f} ms  p99 {results[-1]['p99_pass_ms']:.3f} ms  peak {results[-1]['peak_mb']:.1f} MB")
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+
+
+def compare_to_baseline(report, baseline, tolerance):
+    """Messages for parity failures and throughput regressions beyond tolerance."""
+    stored = {(row["engine"], row["size"]): row for row in baseline["results"]}
+    failures = []
+    for row in report["results"]:
+        if row["parity_max_abs_diff"] > PARITY_TOLERANCE:
+            failures.append(f"{row['engine']} {row['size']:,}: array/scalar parity off by {row['parity_max_abs_diff']:.3g}")
+        previous = stored.get((row["engine"], row["size"]))
+        if previous and row["throughput_per_s"] < previous["throughput_per_s"] * (1 - tolerance):
+            failures.append(
+                f"{row['engine']} {row['size']:,}: {row['throughput_per_s']:,.0f}/s vs baseline "
+                f"{previous['throughput_per_s']:,.0f}/s ({row['throughput_per_s'] / previous['throughput_per_s'] - 1:+.0%})"
+            )
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the salary tax engine.")
+    parser.add_argument("output", help="JSON file for this run's results")
+    parser.add_argument("--baseline", help="Stored baseline JSON to compare against")
+    parser.add_argument("--update-baseline", action="store_true", help="Only write the results (use the baseline path as output)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed throughput drop as a fraction")
+    args = parser.parse_args()
+    report = run_benchmarks(args.sizes)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+    if args.baseline and not args.update_baseline:
+        with open(args.baseline) as f:
+            failures = compare_to_baseline(report, json.load(f), args.tolerance)
+        for failure in failures:
+            print(f"REGRESSION {failure}")
+        if failures:
+            sys.exit(1)
+        print("No regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
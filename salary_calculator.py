@@ -1,78 +1,298 @@
 import streamlit as st
 import pandas as pd
 import io
+import functools
+import numpy as np
+import plotly.graph_objects as go
+from tax_engine import age_rebate, bracket_tax, evaluate_household, marginal_rate, medical_tax_credits, retirement_deduction
+from tax_tables import DEFAULT_TAX_YEAR, available_tax_years, get_tax_tables
 
-# Tax Rates and Rebates (2024/2025)
-TAX_BRACKETS = [
-    (0, 237100, 0.18, 0),
-    (237101, 370500, 0.26, 42678),
-    (370501, 512800, 0.31, 77362),
-    (512801, 673000, 0.36, 121475),
-    (673001, 857900, 0.39, 179147),
-    (857901, 1817000, 0.41, 251258),
-    (1817001, float('inf'), 0.45, 644489)
-]
-REBATES = {
-    "primary": 17235,
-    "secondary": 9444,
-    "tertiary": 3145
-}
-UIF_RATE = 0.01
-UIF_MONTHLY_CAP = 17712
-UIF_ANNUAL_CAP = UIF_MONTHLY_CAP * 12
-MTC_PER_PERSON = 364
-MTC_ADDITIONAL_DEPENDANT = 246
-
-def get_tax_rate(income):
-    """Return the marginal tax rate based on annual taxable income (2024/2025 rates)."""
-    for lower, upper, rate, base_tax in TAX_BRACKETS:
-        if lower <= income <= upper:
-            return rate
-    return 0.45
-
-def calculate_medical_tax_credits(num_dependants):
+SALARY_TAX_FIELDS = (
+    "taxable_income", "paye_before_mtc", "paye_before_mtc_monthly", "mtc_annual", "mtc_monthly", "paye",
+    "paye_monthly", "uif", "uif_monthly", "net_income", "net_income_monthly", "marginal_rate",
+)
+SALARY_TAX_DTYPE = np.dtype([(field, np.float64) for field in SALARY_TAX_FIELDS])
+MONTHLY_PAYE_FIELDS = ("remuneration", "annual_equivalent", "paye_ytd", "paye", "uif", "net_pay")
+MONTHLY_PAYE_DTYPE = np.dtype([(field, np.float64) for field in MONTHLY_PAYE_FIELDS])
+TAX_CURVE_MAX_INCOME = 3_000_000
+TAX_CURVE_STEP = 100
+
+def get_tax_rate(income, tax_year=DEFAULT_TAX_YEAR):
+    """Return the marginal tax rate based on annual taxable income for the tax year."""
+    return float(marginal_rate(income, tax_year))
+
+def calculate_medical_tax_credits(num_dependants, tax_year=DEFAULT_TAX_YEAR):
     """Calculate the Medical Scheme Fees Tax Credit (MTC) based on the number of dependants."""
-    if num_dependants <= 0:
-        return 0, 0
-    if num_dependants <= 2:
-        annual_mtc = num_dependants * MTC_PER_PERSON * 12
-    else:
-        annual_mtc = (2 * MTC_PER_PERSON * 12) + ((num_dependants - 2) * MTC_ADDITIONAL_DEPENDANT * 12)
+    annual_mtc = float(medical_tax_credits(num_dependants, tax_year))
     monthly_mtc = annual_mtc / 12
     return annual_mtc, monthly_mtc
 
-def calculate_salary_tax(gross_salary, pension_contribution, age, medical_contributions, num_dependants):
+def calculate_salary_tax(gross_salary, pension_contribution, age, medical_contributions, num_dependants, tax_year=DEFAULT_TAX_YEAR):
     """Calculate PAYE, UIF, MTC, taxable income, and tax rates."""
-    max_deductible = min(gross_salary * 0.275, 350000)
-    deductible_contribution = min(pension_contribution, max_deductible)
-    taxable_income = max(0, gross_salary - deductible_contribution)
-    tax_before_rebates = 0
-    marginal_rate = 0
-    for lower, upper, rate, base_tax in TAX_BRACKETS:
-        if taxable_income > lower:
-            if taxable_income <= upper:
-                tax_before_rebates = base_tax + (taxable_income - lower) * rate
-                marginal_rate = rate
-                break
-            marginal_rate = rate
-        else:
-            break
-    total_rebate = REBATES["primary"]
-    if age >= 75:
-        total_rebate += REBATES["secondary"] + REBATES["tertiary"]
-    elif age >= 65:
-        total_rebate += REBATES["secondary"]
-    paye_before_mtc = max(0, tax_before_rebates - total_rebate)
-    paye_before_mtc_monthly = paye_before_mtc / 12
-    mtc_annual, mtc_monthly = calculate_medical_tax_credits(num_dependants)
-    paye = max(0, paye_before_mtc - mtc_annual)
-    paye_monthly = paye / 12
-    annual_salary_for_uif = min(gross_salary, UIF_ANNUAL_CAP)
-    uif = annual_salary_for_uif * UIF_RATE
-    uif_monthly = uif / 12
+    household = evaluate_household(gross_salary, pension_contribution, age, num_dependants, tax_year=tax_year)
+    return (
+        household.taxable_income, household.paye_before_mtc, household.paye_before_mtc / 12,
+        household.mtc_annual, household.mtc_annual / 12, household.income_tax, household.income_tax / 12,
+        household.uif, household.uif / 12, household.net_income, household.net_income / 12, household.marginal_rate,
+    )
+
+def calculate_salary_tax_array(gross_salary, pension_contribution, age, medical_contributions, num_dependants, tax_year=DEFAULT_TAX_YEAR):
+    """Vectorized calculate_salary_tax over arrays of employees.
+
+    Inputs broadcast together and run through the tax engine's array primitives (bracket lookup with
+    np.searchsorted, rebates, medical tax credits, UIF cap). Returns a structured array with the same
+    12 outputs (field names in SALARY_TAX_FIELDS).
+    """
+    tables = get_tax_tables(tax_year)
+    gross_salary = np.asarray(gross_salary, dtype=np.float64)
+    age = np.asarray(age)
+    num_dependants = np.asarray(num_dependants)
+    gross_salary, pension_contribution, age, num_dependants = np.broadcast_arrays(gross_salary, pension_contribution, age, num_dependants)
+    result = np.empty(gross_salary.shape, dtype=SALARY_TAX_DTYPE)
+
+    taxable_income = np.maximum(0, gross_salary - retirement_deduction(gross_salary, pension_contribution, tax_year))
+    tax_before_rebates, marginal_rates = bracket_tax(taxable_income, tax_year)
+    paye_before_mtc = np.maximum(0, tax_before_rebates - age_rebate(age, tax_year))
+    mtc_annual = medical_tax_credits(num_dependants, tax_year)
+    paye = np.maximum(0, paye_before_mtc - mtc_annual)
+    uif = np.minimum(gross_salary, tables.uif_annual_cap) * tables.uif_rate
     net_income = gross_salary - paye - uif
-    net_income_monthly = net_income / 12
-    return taxable_income, paye_before_mtc, paye_before_mtc_monthly, mtc_annual, mtc_monthly, paye, paye_monthly, uif, uif_monthly, net_income, net_income_monthly, marginal_rate
+
+    result["taxable_income"] = taxable_income
+    result["paye_before_mtc"] = paye_before_mtc
+    result["paye_before_mtc_monthly"] = paye_before_mtc / 12
+    result["mtc_annual"] = mtc_annual
+    result["mtc_monthly"] = mtc_annual / 12
+    result["paye"] = paye
+    result["paye_monthly"] = paye / 12
+    result["uif"] = uif
+    result["uif_monthly"] = uif / 12
+    result["net_income"] = net_income
+    result["net_income_monthly"] = net_income / 12
+    result["marginal_rate"] = marginal_rates
+    return result
+
+def calculate_gross_from_net(net_income, pension_contribution, age, num_dependants, tax_year=DEFAULT_TAX_YEAR):
+    """Annual gross salary that yields the target annual net income (inverse of calculate_salary_tax).
+
+    Net pay is increasing and linear between kinks: bracket bounds, the points where PAYE
+    clears the rebates and medical credits, the 27.5%/cap retirement deduction limits and the UIF cap.
+    Those kinks are mapped to gross salary, net pay is evaluated there in one vectorized call and the
+    target is solved exactly on its segment. Inputs broadcast, so a whole salary band table inverts at once.
+    """
+    tables = get_tax_tables(tax_year)
+    net_income, pension_contribution, age, num_dependants = np.broadcast_arrays(
+        np.asarray(net_income, dtype=np.float64), np.asarray(pension_contribution, dtype=np.float64),
+        np.asarray(age), np.asarray(num_dependants),
+    )
+    shape = net_income.shape
+    net_income, pension_contribution, age, num_dependants = (
+        a.reshape(-1, 1) for a in (net_income, pension_contribution, age, num_dependants)
+    )
+
+    # Kinks in taxable income: bracket bounds and where tax first exceeds rebates (and rebates + credits)
+    bounds = np.concatenate([tables.bracket_lower, tables.bracket_upper[np.isfinite(tables.bracket_upper)]])
+    rebate = age_rebate(age, tax_year)
+    mtc_annual = medical_tax_credits(num_dependants, tax_year)
+    zero_tax = np.concatenate([
+        np.clip(tables.bracket_lower + (threshold - tables.bracket_base_tax) / tables.bracket_rate, tables.bracket_lower, tables.bracket_upper)
+        for threshold in (rebate, rebate + mtc_annual)
+    ], axis=1)
+    taxable_kinks = np.concatenate([np.broadcast_to(bounds, (len(net_income), len(bounds))), zero_tax], axis=1)
+
+    # Taxable income is max(G - pension, (1 - rate) * G, G - cap), so each kink maps back to the smallest candidate
+    rate, cap = tables.retirement_deduction_rate, tables.retirement_deduction_cap
+    gross_kinks = np.minimum(np.minimum(taxable_kinks + pension_contribution, taxable_kinks / (1 - rate)), taxable_kinks + cap)
+    ceiling = net_income / (1 - tables.bracket_rate[-1] - tables.uif_rate) + gross_kinks.max(axis=1, keepdims=True)
+    gross = np.sort(np.concatenate([
+        np.zeros_like(net_income), gross_kinks, pension_contribution / rate,
+        np.full_like(net_income, cap / rate), np.full_like(net_income, tables.uif_annual_cap), ceiling,
+    ], axis=1), axis=1)
+
+    # SARS rounds each bracket's base tax, so tax can jump by cents just past a bracket top. Two interior
+    # points per segment give its exact line without landing on either side of such a jump.
+    left, right = gross[:, :-1], gross[:, 1:]
+    inner = np.stack([left + (right - left) / 3, left + 2 * (right - left) / 3])
+    net = calculate_salary_tax_array(inner, pension_contribution, age, 0, num_dependants, tax_year)["net_income"]
+    slope = np.divide(net[1] - net[0], inner[1] - inner[0], out=np.zeros_like(left), where=right > left)
+    reach = np.where(right > left, net[0] + (right - inner[0]) * slope, -np.inf)
+    segment = np.argmax(reach >= net_income, axis=1)[:, None]
+    start, rate_of_net = np.take_along_axis(inner[0], segment, 1), np.take_along_axis(slope, segment, 1)
+    solved = start + np.divide(net_income - np.take_along_axis(net[0], segment, 1), rate_of_net, out=np.zeros_like(start), where=rate_of_net > 0)
+    solved = np.clip(solved, np.take_along_axis(left, segment, 1), np.take_along_axis(right, segment, 1))
+    solved = np.where(net_income > 0, solved, 0)
+    return solved.reshape(shape)[()]
+
+def calculate_monthly_paye(monthly_remuneration, monthly_pension, age, num_dependants, bonuses=0, tax_year=DEFAULT_TAX_YEAR):
+    """Month-by-month PAYE and UIF (employees x 12, March to February) using the SARS cumulative method."""
+    tables = get_tax_tables(tax_year)
+    monthly_remuneration = np.atleast_2d(np.asarray(monthly_remuneration, dtype=np.float64))
+    monthly_remuneration, monthly_pension, bonuses = np.broadcast_arrays(
+        monthly_remuneration, np.asarray(monthly_pension, dtype=np.float64), np.asarray(bonuses, dtype=np.float64)
+    )
+    age = np.asarray(age).reshape(-1, 1)
+    num_dependants = np.asarray(num_dependants).reshape(-1, 1)
+    result = np.empty(monthly_remuneration.shape, dtype=MONTHLY_PAYE_DTYPE)
+
+    # Year-to-date state for every employee and month at once
+    months_elapsed = np.arange(1, monthly_remuneration.shape[1] + 1)
+    annualise = 12 / months_elapsed
+    annual_equivalent = np.cumsum(monthly_remuneration, axis=1) * annualise
+    annual_pension = np.cumsum(monthly_pension, axis=1) * annualise
+    bonus_ytd = np.cumsum(bonuses, axis=1)
+
+    regular_paye = calculate_salary_tax_array(annual_equivalent, annual_pension, age, 0, num_dependants, tax_year)["paye"]
+    with_bonus_paye = calculate_salary_tax_array(annual_equivalent + bonus_ytd, annual_pension, age, 0, num_dependants, tax_year)["paye"]
+    paye_ytd = regular_paye / annualise + (with_bonus_paye - regular_paye)
+    paye = np.diff(paye_ytd, axis=1, prepend=0)
+    remuneration = monthly_remuneration + bonuses
+    uif = np.minimum(remuneration, tables.uif_monthly_cap) * tables.uif_rate
+
+    result["remuneration"] = remuneration
+    result["annual_equivalent"] = annual_equivalent + bonus_ytd
+    result["paye_ytd"] = paye_ytd
+    result["paye"] = paye
+    result["uif"] = uif
+    result["net_pay"] = remuneration - paye - uif
+    return result
+
+def optimize_salary_structure(cost_to_company, age, num_dependants, max_bonus_share=0.25, max_travel_allowance=0,
+                              travel_taxable_portion=0.8, min_pension_rate=0.0, max_pension_rate=0.275,
+                              min_take_home=0, tax_year=DEFAULT_TAX_YEAR):
+    """Grid-search the basic/bonus/pension/travel split of a CTC package; returns the best structure and the Pareto table."""
+    tables = get_tax_tables(tax_year)
+    pension_rates = np.arange(min_pension_rate, max_pension_rate + 1e-9, 0.0025)[:, None, None]
+    bonus_shares = np.arange(0, max_bonus_share + 1e-9, 0.01)[None, :, None]
+    travel = np.linspace(0, max_travel_allowance, 21 if max_travel_allowance > 0 else 1)[None, None, :]
+
+    pension = cost_to_company * pension_rates
+    cash = cost_to_company - pension
+    salary_pay = cash - travel
+    bonus = salary_pay * bonus_shares
+    basic = salary_pay - bonus
+    remuneration = salary_pay + travel * travel_taxable_portion
+    taxable_income = np.maximum(0, remuneration - retirement_deduction(remuneration, pension, tax_year))
+    tax_before_rebates = bracket_tax(taxable_income, tax_year)[0]
+    paye = np.maximum(0, np.maximum(0, tax_before_rebates - age_rebate(age, tax_year)) - medical_tax_credits(num_dependants, tax_year))
+    monthly_basic = basic / 12
+    uif = tables.uif_rate * (11 * np.minimum(monthly_basic, tables.uif_monthly_cap) + np.minimum(monthly_basic + bonus, tables.uif_monthly_cap))
+    take_home = cash - paye - uif
+    retained = take_home + pension
+    feasible = (salary_pay >= 0) & (take_home >= min_take_home)
+
+    grid = np.broadcast_arrays(pension, basic, bonus, travel, paye, uif, take_home, retained)
+    columns = [
+        "Pension/RA Contribution (R)", "Basic Pay (R)", "Bonus (R)", "Travel Allowance (R)",
+        "PAYE (R)", "UIF (R)", "Take-Home Pay (R)", "Take-Home + Pension (R)",
+    ]
+    score = np.where(feasible, retained, -np.inf)
+    if not np.isfinite(score).any():
+        return None, pd.DataFrame(columns=columns)
+    best_index = np.unravel_index(np.argmax(score), score.shape)
+    best = {column: float(values[best_index]) for column, values in zip(columns, grid)}
+
+    # Highest take-home at each pension level, then drop levels a higher pension matches or beats
+    flat_take_home = np.where(feasible, take_home, -np.inf).reshape(len(pension_rates), -1)
+    level_best = flat_take_home.argmax(axis=1)
+    levels = np.flatnonzero(np.isfinite(flat_take_home[np.arange(len(level_best)), level_best]))
+    rows = np.column_stack([values.reshape(len(pension_rates), -1)[levels, level_best[levels]] for values in grid])
+    pareto = pd.DataFrame(rows, columns=columns)
+    later_best = np.maximum.accumulate(pareto["Take-Home Pay (R)"].to_numpy()[::-1])[::-1]
+    dominated = np.append(pareto["Take-Home Pay (R)"].to_numpy()[:-1] <= later_best[1:], False)
+    return best, pareto[~dominated].reset_index(drop=True)
+
+@functools.lru_cache(maxsize=None)
+def tax_rate_curves(tax_year=DEFAULT_TAX_YEAR, rebate_age=0, num_dependants=0):
+    """Effective and marginal PAYE rates from R0 to R3M of taxable income at R100 steps.
+
+    Built once per tax year and rebate tier (ages 0, 65 or 75) by the array engine and shared
+    process-wide, so reruns of the salary page redraw the chart without recomputing it.
+    Returns read-only (income, effective_rate, marginal_rate) arrays.
+    """
+    income = np.arange(0, TAX_CURVE_MAX_INCOME + TAX_CURVE_STEP, TAX_CURVE_STEP, dtype=np.float64)
+    taxes = calculate_salary_tax_array(income, 0, rebate_age, 0, num_dependants, tax_year)
+    effective_rate = np.divide(taxes["paye"], income, out=np.zeros_like(income), where=income > 0)
+    curves = (income, effective_rate, np.ascontiguousarray(taxes["marginal_rate"]))
+    for curve in curves:
+        curve.setflags(write=False)
+    return curves
+
+def show_tax_rate_curves(taxable_income, paye, marginal_rate, age, num_dependants, tax_year):
+    """Plot the effective and marginal rate curves with the client's position marked."""
+    rebate_age = 75 if age >= 75 else 65 if age >= 65 else 0
+    income, effective_rate, marginal_rates = tax_rate_curves(tax_year, rebate_age, int(num_dependants))
+    client_effective = paye / taxable_income if taxable_income > 0 else 0
+    fig_curves = go.Figure()
+    fig_curves.add_trace(go.Scatter(x=income, y=effective_rate * 100, mode="lines", name="Effective rate", line=dict(color="#4fd1c5")))
+    fig_curves.add_trace(go.Scatter(x=income, y=marginal_rates * 100, mode="lines", name="Marginal rate", line=dict(color="#f6ad55", shape="hv")))
+    if taxable_income <= TAX_CURVE_MAX_INCOME:
+        fig_curves.add_trace(go.Scatter(
+            x=[taxable_income, taxable_income], y=[client_effective * 100, marginal_rate * 100], mode="markers",
+            name="Client", marker=dict(color="#e6edf7", size=11, line=dict(color="#0f1b30", width=2)),
+        ))
+    fig_curves.update_layout(
+        title=f"Effective vs Marginal Tax Rate ({tax_year})",
+        xaxis_title="Taxable Income (R)",
+        yaxis_title="Rate (%)",
+        showlegend=True,
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="#0f1b30",
+        font={'color': "#e6edf7"},
+        yaxis={'tickfont': {'color': "#e6edf7"}},
+        xaxis={'tickfont': {'color': "#e6edf7"}}
+    )
+    st.plotly_chart(fig_curves, use_container_width=True)
+    if taxable_income > TAX_CURVE_MAX_INCOME:
+        st.caption(f"Taxable income above R{TAX_CURVE_MAX_INCOME:,}: effective rate {client_effective * 100:.1f}%, marginal rate {marginal_rate * 100:.1f}%.")
+
+def show_structuring_panel(cost_to_company, age, num_dependants, tax_year):
+    """Salary structuring inputs, the optimal split and the take-home vs pension Pareto table."""
+    c1, c2 = st.columns(2)
+    with c1:
+        max_bonus_share = st.slider("Maximum Bonus (% of cash pay)", 0, 50, 25) / 100
+        max_travel_allowance = st.number_input("Maximum Travel Allowance (R/year)", min_value=0.0, step=6000.0, format="%.0f")
+    with c2:
+        min_pension_rate = st.slider("Minimum Pension/RA (% of package)", 0.0, 27.5, 0.0, step=0.5) / 100
+        min_take_home = st.number_input("Minimum Take-Home Pay (R/month)", min_value=0.0, step=1000.0, format="%.0f") * 12
+    st.caption("80% of the travel allowance is taxed through PAYE. UIF is charged monthly, so a bonus month above the UIF cap saves contributions.")
+    best, pareto = optimize_salary_structure(
+        cost_to_company, age, num_dependants, max_bonus_share, max_travel_allowance,
+        min_pension_rate=min_pension_rate, min_take_home=min_take_home, tax_year=tax_year,
+    )
+    if best is None:
+        st.warning("No structure meets the minimum take-home pay. Lower the minimum or the pension floor.")
+        return
+    s1, s2, s3, s4 = st.columns(4)
+    s1.metric("Basic pay", f"R {best['Basic Pay (R)'] / 12:,.0f}/m")
+    s2.metric("Bonus", f"R {best['Bonus (R)']:,.0f}")
+    s3.metric("Pension/RA", f"R {best['Pension/RA Contribution (R)'] / 12:,.0f}/m")
+    s4.metric("Travel allowance", f"R {best['Travel Allowance (R)'] / 12:,.0f}/m")
+    st.write(
+        f"**Take-home pay**: R {best['Take-Home Pay (R)'] / 12:,.0f}/month • "
+        f"**Tax and UIF**: R {best['PAYE (R)'] + best['UIF (R)']:,.0f}/year"
+    )
+    fig_pareto = go.Figure()
+    fig_pareto.add_trace(go.Scatter(
+        x=pareto["Pension/RA Contribution (R)"] / 12, y=pareto["Take-Home Pay (R)"] / 12,
+        mode="lines+markers", name="Best take-home", line=dict(color="#4fd1c5"),
+    ))
+    fig_pareto.add_trace(go.Scatter(
+        x=[best["Pension/RA Contribution (R)"] / 12], y=[best["Take-Home Pay (R)"] / 12], mode="markers",
+        name="Optimal", marker=dict(color="#f6ad55", size=12),
+    ))
+    fig_pareto.update_layout(
+        title="Take-Home Pay vs Pension/RA Contribution",
+        xaxis_title="Pension/RA Contribution (R/month)",
+        yaxis_title="Take-Home Pay (R/month)",
+        showlegend=True,
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="#0f1b30",
+        font={'color': "#e6edf7"},
+        yaxis={'tickfont': {'color': "#e6edf7"}},
+        xaxis={'tickfont': {'color': "#e6edf7"}}
+    )
+    st.plotly_chart(fig_pareto, use_container_width=True)
+    st.dataframe(pareto.style.format("R {:,.0f}"), hide_index=True)
 
 def show():
     snapshot = st.session_state.get("client_snapshot", {})
@@ -108,7 +328,24 @@ def show():
         medical_contributions = st.number_input("Annual Medical Scheme Contributions (R)", min_value=0.0, step=1000.0, format="%.0f")
         num_dependants = st.number_input("Number of Dependants on Medical Scheme (including you)", min_value=0, max_value=10, step=1, value=int(snapshot.get("dependants", 0)))
         age = st.number_input("Client's Age", min_value=0, max_value=120, step=1, value=int(snapshot.get("age", 35)))
-        st.caption("SA 2024/25 tax tables and UIF cap assumed. Update values if SARS releases new thresholds.")
+        tax_years = available_tax_years()
+        tax_year = st.selectbox("Tax Year", tax_years, index=tax_years.index(DEFAULT_TAX_YEAR))
+        tables = get_tax_tables(tax_year)
+        st.caption(f"SA {tax_year} tax tables and UIF cap applied. Add a file under data/tax_tables when SARS releases new thresholds.")
+
+    with st.expander("Gross-up: salary needed for a target take-home"):
+        target_net_monthly = st.number_input("Target Net Monthly Income (R)", min_value=0.0, step=1000.0, format="%.0f")
+        if target_net_monthly > 0:
+            required_gross = calculate_gross_from_net(target_net_monthly * 12, pension_contribution, age, num_dependants, tax_year)
+            g1, g2 = st.columns(2)
+            g1.metric("Gross annual salary needed", f"R {required_gross:,.0f}")
+            g2.metric("Gross monthly salary needed", f"R {required_gross / 12:,.0f}")
+            st.caption("Uses the pension/RA contribution, age, dependants and tax year entered above.")
+
+    with st.expander("Salary structuring: basic, bonus, pension/RA and travel allowance"):
+        st.caption("Treats the gross annual salary above as the total cost-to-company to split.")
+        if gross_salary > 0:
+            show_structuring_panel(gross_salary, age, num_dependants, tax_year)
 
     if st.button("Calculate Tax", type="primary"):
         if gross_salary < 0 or pension_contribution < 0 or medical_contributions < 0 or num_dependants < 0 or age < 0:
@@ -116,7 +353,7 @@ def show():
         else:
             try:
                 # ... (rest of the logic remains the same, just changing 'name' variable usage if needed)
-                taxable_income, paye_before_mtc, paye_before_mtc_monthly, mtc_annual, mtc_monthly, paye, paye_monthly, uif, uif_monthly, net_income, net_income_monthly, marginal_rate = calculate_salary_tax(gross_salary, pension_contribution, age, medical_contributions, num_dependants)
+                taxable_income, paye_before_mtc, paye_before_mtc_monthly, mtc_annual, mtc_monthly, paye, paye_monthly, uif, uif_monthly, net_income, net_income_monthly, marginal_rate = calculate_salary_tax(gross_salary, pension_contribution, age, medical_contributions, num_dependants, tax_year)
                 k1, k2, k3 = st.columns(3)
                 k1.metric("Net monthly income", f"R {net_income_monthly:,.0f}")
                 k2.metric("PAYE monthly", f"R {paye_monthly:,.0f}")
@@ -127,7 +364,7 @@ def show():
                     <div class="nav-card">
                         <p><strong>Client:</strong> {client_name} • Taxable income: R {taxable_income:,.0f}</p>
                         <p style="color: var(--muted); margin-bottom: 0.3rem;">
-                            Pension/RA deduction applied: R {min(pension_contribution, gross_salary * 0.275):,.0f}
+                            Pension/RA deduction applied: R {min(pension_contribution, gross_salary * tables.retirement_deduction_rate, tables.retirement_deduction_cap):,.0f}
                         </p>
                     </div>
                     """,
@@ -147,7 +384,7 @@ def show():
                     st.write(f"**Tax Savings from Medical Credits**: {tax_savings_percentage:.1f}% of your PAYE")
                     st.progress(tax_savings_percentage / 100)
                     st.markdown(
-                        "<p style='font-size: 14px; font-style: italic; color: var(--muted);'>Dependent Credits: R364/month for you and your first dependant, R246/month for each additional dependant (e.g., spouse, children, or other family members on your medical scheme).</p>",
+                        f"<p style='font-size: 14px; font-style: italic; color: var(--muted);'>Dependent Credits: R{tables.mtc_per_person:,.0f}/month for you and your first dependant, R{tables.mtc_additional_dependant:,.0f}/month for each additional dependant (e.g., spouse, children, or other family members on your medical scheme).</p>",
                         unsafe_allow_html=True
                     )
                     summary_data["Medical Tax Credits (Annual) (R)"] = [mtc_annual]
@@ -173,8 +410,9 @@ def show():
                     "Amount (R)": [gross_salary, -paye, -uif, -mtc_annual if num_dependants > 0 else 0, net_income]
                 })
                 st.bar_chart(chart_data.set_index("Category"))
+                show_tax_rate_curves(taxable_income, paye, marginal_rate, age, num_dependants, tax_year)
                 st.markdown(
-                    "<p style='font-size: 14px; color: var(--muted);'>Note: Tax rates, UIF limits, and medical tax credits are based on 2024/2025 SARS tables. Verify with 2025/2026 rates when available.</p>",
+                    f"<p style='font-size: 14px; color: var(--muted);'>Note: Tax rates, UIF limits, and medical tax credits are based on the {tax_year} SARS tables.</p>",
                     unsafe_allow_html=True
                 )
                 summary_df = pd.DataFrame(summary_data)
@@ -0,0 +1,97 @@
+import functools
+import glob
+import json
+import os
+from types import MappingProxyType
+from typing import NamedTuple
+
+import numpy as np
+
+TAX_TABLES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "tax_tables")
+DEFAULT_TAX_YEAR = "2025/26"
+
+
+class TaxTables(NamedTuple):
+    """One SARS tax year compiled into read-only lookup arrays and scalars."""
+    tax_year: str
+    brackets: tuple
+    bracket_lower: np.ndarray
+    bracket_upper: np.ndarray
+    bracket_rate: np.ndarray
+    bracket_base_tax: np.ndarray
+    rebates: MappingProxyType
+    uif_rate: float
+    uif_monthly_cap: float
+    uif_annual_cap: float
+    mtc_per_person: float
+    mtc_additional_dependant: float
+    retirement_deduction_rate: float
+    retirement_deduction_cap: float
+    dividend_tax_rate: float
+    cgt_inclusion_rate: float
+    cgt_annual_exclusion: float
+    cgt_death_exclusion: float
+    interest_exemption_under_65: float
+    interest_exemption_65_and_over: float
+    estate_duty_abatement: float
+    estate_duty_rate: float
+    estate_duty_upper_rate: float
+    estate_duty_threshold: float
+
+
+def _read_only(values):
+    array = np.array(values, dtype=np.float64)
+    array.setflags(write=False)
+    return array
+
+
+@functools.lru_cache(maxsize=None)
+def available_tax_years():
+    """Tax years with a table file in data/tax_tables, oldest first (e.g. "2024/25")."""
+    names = (os.path.splitext(os.path.basename(path))[0] for path in glob.glob(os.path.join(TAX_TABLES_DIR, "*.json")))
+    return tuple(sorted(name.replace("-", "/") for name in names))
+
+
+def get_tax_tables(tax_year=DEFAULT_TAX_YEAR):
+    """Load and compile one tax year's tables; memoized so every calculator shares the same instance."""
+    # Normalise before the cached call so get_tax_tables() and get_tax_tables("2025/26") share one entry
+    return _load_tax_tables(str(tax_year or DEFAULT_TAX_YEAR).strip().replace("-", "/"))
+
+
+@functools.lru_cache(maxsize=None)
+def _load_tax_tables(tax_year):
+    path = os.path.join(TAX_TABLES_DIR, f"{tax_year.replace('/', '-')}.json")
+    if not os.path.exists(path):
+        raise ValueError(f"No SARS tables for tax year {tax_year}. Available: {', '.join(available_tax_years())}")
+    with open(path) as f:
+        raw = json.load(f)
+    brackets = tuple(
+        (lower, float("inf") if upper is None else upper, rate, base_tax)
+        for lower, upper, rate, base_tax in raw["brackets"]
+    )
+    return TaxTables(
+        tax_year=raw["tax_year"],
+        brackets=brackets,
+        bracket_lower=_read_only([bracket[0] for bracket in brackets]),
+        bracket_upper=_read_only([bracket[1] for bracket in brackets]),
+        bracket_rate=_read_only([bracket[2] for bracket in brackets]),
+        bracket_base_tax=_read_only([bracket[3] for bracket in brackets]),
+        rebates=MappingProxyType(dict(raw["rebates"])),
+        uif_rate=raw["uif"]["rate"],
+        uif_monthly_cap=raw["uif"]["monthly_cap"],
+        uif_annual_cap=raw["uif"]["monthly_cap"] * 12,
+        mtc_per_person=raw["medical_tax_credits"]["per_person"],
+        mtc_additional_dependant=raw["medical_tax_credits"]["additional_dependant"],
+        retirement_deduction_rate=raw["retirement_deduction"]["rate"],
+        retirement_deduction_cap=raw["retirement_deduction"]["cap"],
+        dividend_tax_rate=raw["dividend_tax_rate"],
+        cgt_inclusion_rate=raw["capital_gains"]["inclusion_rate"],
+        cgt_annual_exclusion=raw["capital_gains"]["annual_exclusion"],
+        cgt_death_exclusion=raw["capital_gains"]["death_exclusion"],
+        interest_exemption_under_65=raw["interest_exemption"]["under_65"],
+        interest_exemption_65_and_over=raw["interest_exemption"]["65_and_over"],
+        estate_duty_abatement=raw["estate_duty"]["abatement"],
+        estate_duty_rate=raw["estate_duty"]["rate"],
+        estate_duty_upper_rate=raw["estate_duty"]["upper_rate"],
+        estate_duty_threshold=raw["estate_duty"]["upper_threshold"],
+    )
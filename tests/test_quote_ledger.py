@@ -0,0 +1,28 @@
+import sqlite3
+from contextlib import closing
+
+import pytest
+
+from quote_ledger import commission_totals, connect_ledger, record_quote, verify_rollup
+
+
+def test_commission_rollup_only_changes_through_quotes(tmp_path):
+    with closing(connect_ledger(tmp_path / "ledger.sqlite")) as connection:
+        for advisor, amount in (("A", 100_000), ("A", 250_000), ("B", 500_000)):
+            quote = {"broker_fee": amount * 0.05, "net_total_return": amount * 0.5}
+            record_quote(connection, advisor, "Client", "Strategic Income", "2025-03", "2025/26", amount, quote, "2025-04-01T09:00:00")
+        totals = commission_totals(connection, ("advisor",))
+        assert totals["broker_fee"].tolist() == [17_500.0, 25_000.0]
+
+        for statement in (
+            "UPDATE quotes SET broker_fee = 0",
+            "DELETE FROM quotes",
+            "UPDATE commission_rollup SET broker_fee = 0",
+            "UPDATE commission_rollup SET broker_fee = 0, quotes = quotes + 1",
+            "DELETE FROM commission_rollup",
+            "INSERT INTO commission_rollup VALUES ('C', 'Strategic Income', '2025-04', 1, 1, 1, 1)",
+        ):
+            with pytest.raises(sqlite3.DatabaseError):
+                with connection:
+                    connection.execute(statement)
+        assert verify_rollup(connection).empty
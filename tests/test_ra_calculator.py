@@ -0,0 +1,31 @@
+import numpy as np
+
+from ra_calculator import optimize_ra_schedule, simulate_ra_carry_forward
+
+
+def test_optimized_schedule_beats_even_spread_and_brute_force():
+    rng = np.random.default_rng(20250301)
+    for _ in range(200):
+        incomes = rng.uniform(100_000, 900_000, (1, 2))
+        budget = rng.uniform(0, 300_000)
+        age = int(rng.integers(25, 90))
+        num_dependants = int(rng.integers(0, 4))
+        optimized = optimize_ra_schedule(incomes, budget, 0, age, num_dependants)["total_rebate"][0]
+
+        even = simulate_ra_carry_forward(incomes, budget / 2, 0, age, num_dependants)["total_rebate"][0]
+        first_year = np.linspace(0, budget, 2001)
+        splits = np.stack([first_year, budget - first_year], axis=1)
+        brute_force = simulate_ra_carry_forward(
+            np.repeat(incomes, len(splits), axis=0), splits, 0, age, num_dependants
+        )["total_rebate"].max()
+
+        assert optimized >= even - 1e-6
+        assert optimized >= brute_force - 1e-6
+
+
+def test_bracket_edges_do_not_strand_the_budget():
+    # Regression: a one-rand slice at each bracket edge used to zero the rates above it
+    incomes = np.array([[200_000, 215_000, 230_000, 245_000, 253_000]], dtype=np.float64)
+    optimized = optimize_ra_schedule(incomes, 193_170, 0, 80, 2)["total_rebate"][0]
+    even = simulate_ra_carry_forward(incomes, 193_170 / 5, 0, 80, 2)["total_rebate"][0]
+    assert optimized >= even
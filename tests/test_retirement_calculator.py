@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from retirement_calculator import (
+    aggregate_provisions, build_retirement_ledger, calculate_years_until_depletion, required_retirement_age, simulate_depletion_paths,
+)
+
+
+def test_ledger_real_withdrawals_match_depletion_series():
+    years_to_retirement, horizon_years, inflation_rate, assumed_return = 25, 35, 0.055, 0.08
+    annual_income = 549_525.12
+    ledger = build_retirement_ledger(
+        [1_200_000, 350_000], [0.09, 0.07], [6_000, 1_500], [0.05, 0.0], years_to_retirement,
+        40, annual_income, inflation_rate, assumed_return, horizon_years,
+    )
+    capital = ledger["balance"][12 * years_to_retirement]
+    *_, monthly_income_today_value = calculate_years_until_depletion(
+        capital, annual_income, inflation_rate, years_to_retirement, assumed_return, max_years=horizon_years
+    )
+    paid_years = min(len(monthly_income_today_value), horizon_years)
+    anniversaries = ledger[12 * years_to_retirement + 1::12]
+    np.testing.assert_allclose(anniversaries["real_withdrawal"][:paid_years] / 12, monthly_income_today_value[:paid_years], rtol=1e-12)
+
+
+def test_depletion_at_the_horizon_boundary_matches_the_path_engine():
+    max_years, annual_income, assumed_return = 32, 400_000, 0.07
+    capitals = np.linspace(3_000_000, 6_000_000, 601)
+    scalar = np.array([
+        calculate_years_until_depletion(capital, annual_income, 0.05, 10, assumed_return, max_years=max_years)[0]
+        for capital in capitals
+    ])
+    paths = simulate_depletion_paths(
+        capitals, annual_income, 0.05, 10, assumed_return, return_volatility=0, inflation_volatility=0,
+        num_paths=len(capitals), horizon_years=max_years, escalate_income=False,
+    )["depletion_years"]
+    # The sweep must cross the boundary: some clients deplete in the last year, some outlast it
+    assert (scalar == max_years).any() and np.isinf(scalar).any()
+    assert np.all((scalar <= max_years) | np.isinf(scalar))
+    np.testing.assert_array_equal(scalar, paths)
+
+
+def test_provision_totals_leave_no_residue_after_removal():
+    state = {}
+    provision = {"current_value": 0.1, "annual_return": 0.07, "monthly_contribution": 0.0, "contribution_increase": 0.0}
+    others = [dict(provision, current_value=value) for value in (0.2, 0.3)]
+    aggregate_provisions([provision, *others], 10, state)
+    # Removing and zeroing provisions used to leave a running weight of about 1e-17
+    _, total, average_return = aggregate_provisions([dict(provision, current_value=0.0)], 10, state)
+    assert total == 0 and average_return == 0
+    _, total, average_return = aggregate_provisions([dict(provision, current_value=0.2, annual_return=0.09)], 10, state)
+    assert average_return == pytest.approx(0.09, rel=1e-12)
+
+
+def test_required_retirement_age_finds_a_window_the_target_later_outgrows():
+    # Contributions catch the target at 52, but 12% income inflation overtakes them again after 58
+    ages = required_retirement_age([40, 40], 10_000, 0.12, 0.0, 0, 0.1, [[0], [0]], [[0.08], [0.08]], [[20_000], [20_000]], max_age=[80, 51])
+    np.testing.assert_array_equal(ages, [52, np.nan])